@@ -1,21 +1,160 @@
-from solver import FormulaSolver
-from flask import Flask, request, jsonify, send_file, session
+import solver as solver_module
+from solver import FormulaSolver, configure_solve_pool
+from pipeline import run_pipeline
+from jobs import JobCancelledError, JobLimitError, JobManager
+from solve_pool import SolvePool
+from session_store import create_session_store
+from cache import BytesLRUCache
+from renderer import PlotRenderer
+from lazy import preload as preload_modules
+from instrumentation import REQUEST_SECONDS, begin_request, end_request, render_prometheus, server_timing_header, stage
+from profiling import ProfileStore, RequestProfile, RequestProfiler, verify_signature
+from warmup import load_warmup_pairs, warm_up
+import renderer as renderer_module
+from flask import Flask, Response, g, request, jsonify, send_file, session, stream_with_context
+from flask.sessions import SecureCookieSessionInterface
 from flask_cors import CORS
 from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import base64
+import hashlib
+import hmac
+import json
+import numpy as np
+import os
+import secrets
+import struct
+import time
 from functools import wraps
 
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that also mark the start of request timing, since opening the session is the first thing Flask does."""
+
+    def open_session(self, app, request):
+        begin_request()
+        with stage("cookie"):
+            return super().open_session(app, request)
+
+
 app = Flask(__name__)
+app.session_interface = TimedSessionInterface()
 
 
 app.secret_key = "daisuki-neko-chan"  
 app.config['SESSION_COOKIE_HTTPONLY'] = True  # Security: prevent JavaScript access
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Security: CSRF protection
 
+# Solver state lives server-side; the cookie only carries the session id.
+# Use sqlite or redis when running more than one worker process.
+app.config['SESSION_BACKEND'] = os.environ.get("MATH_SOLVER_SESSION_BACKEND", "memory")
+app.config['SESSION_TTL'] = int(os.environ.get("MATH_SOLVER_SESSION_TTL", 3600))
+app.config['SESSION_SQLITE_PATH'] = os.environ.get("MATH_SOLVER_SESSION_SQLITE_PATH", "sessions.sqlite3")
+app.config['SESSION_REDIS_URL'] = os.environ.get("MATH_SOLVER_SESSION_REDIS_URL")
+# A positive SOLVE_TIMEOUT runs sp.solve in a pool of worker processes with that deadline (seconds)
+app.config['SOLVE_TIMEOUT'] = float(os.environ.get("MATH_SOLVER_SOLVE_TIMEOUT", 0))
+app.config['SOLVE_WORKERS'] = int(os.environ.get("MATH_SOLVER_SOLVE_WORKERS", 2))
+app.config['SOLVE_MEMORY_MB'] = int(os.environ.get("MATH_SOLVER_SOLVE_MEMORY_MB", 1024))
+app.config['SOLVE_QUEUE_TIMEOUT'] = float(os.environ.get("MATH_SOLVER_SOLVE_QUEUE_TIMEOUT", 1.0))
+# Background sweep jobs (`"async": true`): pool size, unfinished jobs per session, seconds results are kept
+app.config['JOB_WORKERS'] = int(os.environ.get("MATH_SOLVER_JOB_WORKERS", 4))
+app.config['JOBS_PER_SESSION'] = int(os.environ.get("MATH_SOLVER_JOBS_PER_SESSION", 2))
+app.config['JOB_TTL'] = int(os.environ.get("MATH_SOLVER_JOB_TTL", 600))
+app.config['PIPELINE_BATCH_MAX_JOBS'] = int(os.environ.get("MATH_SOLVER_PIPELINE_BATCH_MAX_JOBS", 32))
+# Formulas solved and compiled by preload(): a JSON file of {"formula_string", "target"} entries
+# and/or the N most used entries of the on-disk solve cache (needs MATH_SOLVER_SOLVE_CACHE_DIR)
+app.config['WARMUP_FILE'] = os.environ.get("MATH_SOLVER_WARMUP_FILE")
+app.config['WARMUP_TOP'] = int(os.environ.get("MATH_SOLVER_WARMUP_TOP", 0))
+app.config['PLOT_CACHE_MAX_BYTES'] = int(os.environ.get("MATH_SOLVER_PLOT_CACHE_BYTES", 64 * 1024 * 1024))
+# Per-stage Server-Timing headers on every response; stage histograms at /api/metrics are always kept
+app.config['SERVER_TIMING'] = os.environ.get("MATH_SOLVER_SERVER_TIMING", "1") not in ("0", "false", "no")
+# cProfile every /api request (local debugging), or only those carrying an X-Profile header signed with the secret.
+# Profiles are downloadable from /api/profiles with "Authorization: Bearer <secret>"; without a secret they stay off.
+app.config['PROFILE_REQUESTS'] = os.environ.get("MATH_SOLVER_PROFILE", "0") in ("1", "true", "yes")
+app.config['PROFILE_SECRET'] = os.environ.get("MATH_SOLVER_PROFILE_SECRET", "")
+app.config['PROFILE_KEEP'] = int(os.environ.get("MATH_SOLVER_PROFILE_KEEP", 20))
+
+session_store = create_session_store(
+    app.config['SESSION_BACKEND'],
+    ttl=app.config['SESSION_TTL'],
+    sqlite_path=app.config['SESSION_SQLITE_PATH'],
+    redis_url=app.config['SESSION_REDIS_URL']
+)
+
 CORS(app, supports_credentials=True)
 
+renderer = PlotRenderer()
+
+solve_pool = None
+if app.config['SOLVE_TIMEOUT'] > 0:
+    solve_pool = SolvePool(
+        max_workers=app.config['SOLVE_WORKERS'],
+        timeout=app.config['SOLVE_TIMEOUT'],
+        memory_limit_mb=app.config['SOLVE_MEMORY_MB'],
+        queue_timeout=app.config['SOLVE_QUEUE_TIMEOUT']
+    )
+    configure_solve_pool(solve_pool)
+plot_cache = BytesLRUCache(max_bytes=app.config['PLOT_CACHE_MAX_BYTES'])
+
+job_manager = JobManager(
+    max_workers=app.config['JOB_WORKERS'],
+    per_owner_limit=app.config['JOBS_PER_SESSION'],
+    ttl=app.config['JOB_TTL']
+)
+
+profile_store = ProfileStore(maxlen=app.config['PROFILE_KEEP'])
+request_profiler = RequestProfiler()
+
+warmup_stats = None
+
+
+def preload() -> None:
+    """
+    Import sympy and matplotlib, build this thread's figures and warm up the configured formulas
+    now instead of on the first requests.
+    Call it in a pre-forking master (see gunicorn.conf.py) so every worker starts warm and shares the pages.
+    """
+    global warmup_stats
+    preload_modules(solver_module.sp, renderer_module.mpl_figure, renderer_module.backend_agg)
+    renderer.preload()
+    if app.config['WARMUP_FILE'] or app.config['WARMUP_TOP']:
+        warmup_stats = warm_up(load_warmup_pairs(app.config['WARMUP_FILE'], app.config['WARMUP_TOP']))
+
+
+def _reset_connections_after_fork() -> None:
+    # SQLite connections opened before a fork must not be used by both processes
+    session_store.reset_connections()
+    solver_module.SOLVE_CACHE.reset_connections()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_connections_after_fork)
+
+# Bump when the plot styling changes so old ETags stop matching
+PLOT_CACHE_VERSION = 1
+
+SWEEP_FORMATS = ("png", "json", "binary", "ndjson", "sse")
+# Formats that stream the sweep chunk by chunk instead of building it in memory first
+STREAM_FORMATS = ("ndjson", "sse")
+SWEEP_MODES = ("uniform", "adaptive")
+# "chosen" sweeps the solution picked with choose_solution, "all" every solution of a multi-root target at once
+SWEEP_BRANCHES = ("chosen", "all")
+
+# Binary sweep payload: 16-byte header (magic, version, point count, skipped count) followed by
+# x_values, y_values and skipped as little-endian float64. The header keeps the arrays 8-byte aligned
+# so clients can view them directly as Float64Array.
+SWEEP_BINARY_MAGIC = b"MSWP"
+SWEEP_BINARY_VERSION = 1
+SWEEP_BINARY_HEADER = struct.Struct("<4sIII")
+
+# Grid payloads use the same header layout with magic MSWG and counts (x steps, y steps),
+# followed by x_grid, y_grid and the row-major z grid (NaN for skipped points)
+GRID_BINARY_MAGIC = b"MSWG"
+# Parameter-family payloads: magic MSWF, counts (points, families), then x_values and one y row per family
+FAMILY_BINARY_MAGIC = b"MSWF"
+GRID_FORMATS = ("png", "json", "binary")
+GRID_PLOTS = ("heatmap", "contour")
+
 """require specific preconditions for  run"""
 def require_json(func):
     @wraps(func)
@@ -98,44 +237,405 @@ def require_types(**field_types):
 
 """"helper/saver methods"""
 
-def _solver_to_session_dict(solver: FormulaSolver) -> dict:
-    # Keep session payload small: large arrays can exceed browser cookie limits.
-    data = solver.to_dict()
-    data["x_values"] = []
-    data["y_values"] = []
-    data["skipped"] = []
-    return data
-
-
 def get_solver_from_session():
     """
-    Load solver from Flask session cookie.
+    Load solver from the server-side session store.
     Returns: (solver, error_dict) - if error_dict is not None, return it as error response
     """
-    solver_dict = session.get("solver_data")
-    if not solver_dict:
+    session_id = session.get("session_id")
+    try:
+        with stage("session_load"):
+            solver = session_store.load(session_id) if session_id else None
+    except Exception as e:
+        return None, {
+            "status": "error",
+            "status_bool": False,
+            "error": f"Failed to load solver: {str(e)}"
+        }
+
+    if solver is None:
         return None, {
             "status": "error",
             "status_bool": False,
             "error": "No solver session found. Call /api/set_formula first."
         }
+    return solver, None
+
+def save_solver_to_session(solver):
+    """Save solver state to the session store and keep only its id in the cookie"""
+    session_id = session.get("session_id")
+    if not session_id:
+        session_id = secrets.token_urlsafe(32)
+        session["session_id"] = session_id
+    session.pop("solver_data", None)
+    with stage("session_save"):
+        session_store.save(session_id, solver)
+
+
+@app.after_request
+def record_request_timing(response):
+    total, stages = end_request()
+    if not total:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUEST_SECONDS.observe((endpoint, request.method, str(response.status_code)), total)
+    if app.config['SERVER_TIMING']:
+        response.headers["Server-Timing"] = server_timing_header(total, stages)
+    return response
+
+
+@app.before_request
+def start_profiling():
+    if not request.path.startswith("/api") or request.path.startswith("/api/profiles"):
+        return
+    signed = verify_signature(app.config['PROFILE_SECRET'], request.headers.get("X-Profile", ""), request.method, request.path)
+    if not (app.config['PROFILE_REQUESTS'] or signed):
+        return
+    g.profiler = request_profiler.start()
+    g.profile_started = time.perf_counter()
+    g.profile_skipped = g.profiler is None
+
+
+@app.after_request
+def finish_profiling(response):
+    # Streamed bodies are produced after this hook, so only their setup ends up in the profile
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        seconds = time.perf_counter() - g.profile_started
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        profile = RequestProfile(request.method, request.path, endpoint, response.status_code, seconds, request_profiler.stop(profiler))
+        profile_store.add(profile)
+        response.headers["X-Profile-Id"] = profile.id
+    elif g.pop("profile_skipped", False):
+        response.headers["X-Profile-Id"] = "skipped: another request is being profiled"
+    return response
 
+
+@app.teardown_request
+def stop_profiling(error=None):
+    # after_request doesn't run when a response couldn't be built; never leave the profiler running
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        request_profiler.stop(profiler)
+
+
+def _profile_admin_error():
+    """Error response unless the request carries the profiling secret, None if it does."""
+    secret = app.config['PROFILE_SECRET']
+    if not secret:
+        return jsonify({"status": "error", "status_bool": False, "error": "Profiling is not configured"}), 404
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(token.encode(), secret.encode()):
+        return jsonify({"status": "error", "status_bool": False, "error": "Invalid profiling token"}), 403
+    return None
+
+
+def _sweep_cache_key(solver, start, end, steps, mode, tolerance, fixed_sets=None, branches="chosen") -> str:
+    """Deterministic key (and ETag) for a rendered sweep: identical inputs always draw the same PNG."""
+    inputs = {
+        "version": PLOT_CACHE_VERSION,
+        "formula_string": solver.formula_string,
+        "target": solver.target_variable,
+        "is_numeric": solver.is_numeric,
+        # choose_solution doesn't move solver.index, so key on the expression actually being swept
+        "solved_expression": solver.solved_expression_string,
+        "sweeper": solver.sweeper,
+        "fixed": solver.fixed,
+        "start": float(start),
+        "end": float(end),
+        "steps": steps,
+        "mode": mode,
+        "tolerance": tolerance,
+        "fixed_sets": fixed_sets,
+        "branches": branches
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _png_response(png: bytes, etag: str, download_name: str):
+    response = send_file(
+        BytesIO(png),
+        mimetype='image/png',
+        as_attachment=False,
+        download_name=download_name,
+        conditional=False
+    )
+    response.set_etag(etag)
+    return response
+
+
+def _pack_binary(magic: bytes, first_count: int, second_count: int, arrays) -> bytes:
+    header = SWEEP_BINARY_HEADER.pack(magic, SWEEP_BINARY_VERSION, first_count, second_count)
+    return b"".join([header, *(np.asarray(array, dtype="<f8").tobytes() for array in arrays)])
+
+
+def _encode_sweep_binary(x_values, y_values, skipped) -> bytes:
+    return _pack_binary(SWEEP_BINARY_MAGIC, len(x_values), len(skipped), [x_values, y_values, skipped])
+
+
+def _encode_grid_binary(x_grid, y_grid, z_grid) -> bytes:
+    return _pack_binary(GRID_BINARY_MAGIC, x_grid.size, y_grid.size, [x_grid, y_grid, z_grid])
+
+
+def _encode_family_binary(x_grid, y_grid) -> bytes:
+    return _pack_binary(FAMILY_BINARY_MAGIC, x_grid.size, y_grid.shape[0], [x_grid, y_grid])
+
+
+def _family_sweep_body(solver, family_response, fixed_sets, response_format, x_label, etag):
+    """
+    Body of a successful family sweep, shared by the synchronous and background paths:
+    PNG bytes (also put in plot_cache), binary bytes, or the JSON fields as a dict.
+    """
+    x_grid = family_response["x_grid"]
+    y_grid = family_response["y_grid"]
+    y_label = solver.target_variable or "y"
+
+    if response_format == "binary":
+        return _encode_family_binary(x_grid, y_grid)
+
+    if response_format == "png":
+        labels = [", ".join(f"{name}={value}" for name, value in sorted(fixed.items())) for fixed in fixed_sets]
+        png = renderer.render_lines(
+            x_grid,
+            y_grid,
+            labels,
+            x_label,
+            y_label,
+            skipped_count=sum(family_response["skipped_counts"])
+        )
+        plot_cache.put(etag, png)
+        return png
+
+    return {
+        "x_values": x_grid.tolist(),
+        "y_values": np.where(np.isnan(y_grid), None, y_grid).tolist(),
+        "fixed_sets": fixed_sets,
+        "skipped_counts": family_response["skipped_counts"],
+        "x_label": x_label,
+        "y_label": y_label
+    }
+
+
+def _family_sweep_response(solver, start, end, steps, fixed_sets, response_format, x_label, etag, download_name):
+    """Evaluate every fixed set against one x grid and answer as a multi-line PNG, stacked JSON or binary."""
+    family_response = solver.perform_family_sweep(start, end, steps, fixed_sets)
+
+    if family_response["status"] != "success":
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": family_response["error"]
+        }), 400
+
+    body = _family_sweep_body(solver, family_response, fixed_sets, response_format, x_label, etag)
+    if response_format == "json":
+        return jsonify({"status": "success", "status_bool": True, **body, "error": ""}), 200
+    if response_format == "binary":
+        return Response(body, mimetype="application/octet-stream")
+    return _png_response(body, etag, download_name)
+
+
+def _branch_sweep_response(solver, start, end, steps, response_format, x_label, etag, download_name):
+    """Evaluate every solution over one x grid and answer as a multi-line PNG, per-branch JSON or binary."""
+    branch_response = solver.perform_branch_sweep(start, end, steps)
+
+    if branch_response["status"] != "success":
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": branch_response["error"]
+        }), 400
+
+    branches = branch_response["branches"]
+    y_label = solver.target_variable or "y"
+
+    if response_format == "json":
+        return jsonify({
+            "status": "success",
+            "status_bool": True,
+            "x_values": branch_response["x_values"],
+            "branches": branches,
+            "x_label": x_label,
+            "y_label": y_label,
+            "is_const": branch_response["is_const"],
+            "error": ""
+        }), 200
+
+    x_grid = np.asarray(branch_response["x_values"], dtype=float)
+    y_grid = np.array([branch["y_values"] for branch in branches], dtype=float).reshape(len(branches), len(x_grid))
+
+    if response_format == "binary":
+        return Response(_encode_family_binary(x_grid, y_grid), mimetype="application/octet-stream")
+
+    labels = [f"{y_label}[{branch['index']}] = {_shorten(branch['solution'])}" for branch in branches]
+    png = renderer.render_lines(
+        x_grid,
+        y_grid,
+        labels,
+        x_label,
+        y_label,
+        skipped_count=sum(sum(branch["skipped"]) for branch in branches)
+    )
+    plot_cache.put(etag, png)
+    return _png_response(png, etag, download_name)
+
+
+def _shorten(text: str, limit: int = 40) -> str:
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _pipeline_result(job: dict):
+    """Run one pipeline job; with "plot": true the sweep also comes back as a base64 PNG."""
+    result, solver = run_pipeline(job)
+    if result["status_bool"] and job.get("plot") is True:
+        sweep = result["sweep"]
+        png = renderer.render_line(
+            sweep["x_values"],
+            sweep["y_values"],
+            sweep["x_label"],
+            sweep["y_label"],
+            skipped_count=len(sweep["skipped"]),
+            breaks=sweep["poles"]
+        )
+        sweep["png_base64"] = base64.b64encode(png).decode("ascii")
+    return result, solver
+
+
+def _batch_job_result(job) -> dict:
+    """_pipeline_result of one batch job; a job that crashes fails on its own instead of taking the batch down."""
     try:
-        solver = FormulaSolver.from_dict(solver_dict)
-        return solver, None
+        return _pipeline_result(job)[0]
     except Exception as e:
-        return None, {
+        return {
             "status": "error",
             "status_bool": False,
-            "error": f"Failed to load solver: {str(e)}"
+            "steps": {},
+            "failed_step": None,
+            "sweep": None,
+            "error": f"Server error: {str(e)}"
         }
 
-def save_solver_to_session(solver):
-    """Save solver state to Flask session cookie"""
-    session["solver_data"] = _solver_to_session_dict(solver)
 
+def _stream_sweep_response(solver, start, end, steps, response_format, x_label):
+    """
+    Stream a uniform sweep as newline-delimited JSON or server-sent events: a "start" record,
+    one "chunk" record per solver.iter_sweep chunk and a closing "end" (or "error") record.
+    """
+    y_label = solver.target_variable or "y"
+
+    def encode(record: dict) -> str:
+        if response_format == "sse":
+            return f"event: {record['type']}\ndata: {json.dumps(record)}\n\n"
+        return json.dumps(record) + "\n"
+
+    def generate():
+        yield encode({"type": "start", "steps": steps, "x_label": x_label, "y_label": y_label, "is_const": solver.is_const})
+        points = 0
+        skipped_count = 0
+        try:
+            for index, chunk in enumerate(solver.iter_sweep(start, end, steps)):
+                if chunk["status"] != "success":
+                    yield encode({"type": "error", "error": chunk["error"]})
+                    return
+                points += len(chunk["x_values"])
+                skipped_count += len(chunk["skipped"])
+                yield encode({
+                    "type": "chunk",
+                    "index": index,
+                    "x_values": chunk["x_values"],
+                    "y_values": chunk["y_values"],
+                    "skipped": chunk["skipped"],
+                    "evaluated": points + skipped_count
+                })
+        except Exception as e:
+            yield encode({"type": "error", "error": f"Server error: {str(e)}"})
+            return
+        yield encode({"type": "end", "points": points, "skipped_count": skipped_count})
+
+    mimetype = "text/event-stream" if response_format == "sse" else "application/x-ndjson"
+    # No-buffering hint for nginx-style proxies, otherwise progress only shows up at the end
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+def _sweep_job_work(solver, start, end, steps, mode, tolerance, fixed_sets, response_format, x_label, etag):
+    """
+    Background version of /api/perform_sweep for job_manager: the job result is the body the synchronous
+    request would have returned, a JSON-ready dict or PNG bytes. Progress is reported, and cancellation
+    noticed, between uniform chunks, adaptive refinement passes and batches of fixed sets.
+    """
+    y_label = solver.target_variable or "y"
 
+    def work(job):
+        def report(fraction):
+            # Called by the solver between batches and refinement passes
+            if job.cancel_event.is_set():
+                raise JobCancelledError()
+            job.progress = fraction
 
+        if fixed_sets is not None:
+            family_response = solver.perform_family_sweep(start, end, steps, fixed_sets, progress=report)
+            if family_response["status"] != "success":
+                raise ValueError(family_response["error"])
+            return _family_sweep_body(solver, family_response, fixed_sets, response_format, x_label, etag)
+
+        if mode == "adaptive":
+            sweep_response = solver.perform_adaptive_sweep(start, end, steps, tolerance, progress=report)
+            if sweep_response["status"] != "success":
+                raise ValueError(sweep_response["error"])
+            x_values = sweep_response["x_values"]
+            y_values = sweep_response["y_values"]
+            skipped = sweep_response["skipped"]
+            poles = sweep_response["poles"]
+        else:
+            x_values, y_values, skipped, poles = [], [], [], []
+            for chunk in solver.iter_sweep(start, end, steps):
+                if job.cancel_event.is_set():
+                    raise JobCancelledError()
+                if chunk["status"] != "success":
+                    raise ValueError(chunk["error"])
+                x_values.extend(chunk["x_values"])
+                y_values.extend(chunk["y_values"])
+                skipped.extend(chunk["skipped"])
+                job.progress = (len(x_values) + len(skipped)) / steps
+
+        if response_format == "png":
+            png = renderer.render_line(x_values, y_values, x_label, y_label, skipped_count=len(skipped), breaks=poles)
+            plot_cache.put(etag, png)
+            return png
+        return {
+            "x_values": x_values,
+            "y_values": y_values,
+            "skipped": skipped,
+            "poles": poles,
+            "mode": mode,
+            "x_label": x_label,
+            "y_label": y_label,
+            "is_const": solver.is_const
+        }
+
+    return work
+
+
+def _job_response(job, status_code: int = 200):
+    body = job.to_dict()
+    body.update({"status_bool": job.status != "failed", "result": None, "result_url": None})
+    if job.status == "succeeded":
+        if isinstance(job.result, bytes):
+            body["result_url"] = f"/api/jobs/{job.id}/result"
+        else:
+            body["result"] = job.result
+    return jsonify(body), status_code
+
+
+def _job_not_found(job_id: str):
+    return jsonify({
+        "status": "error",
+        "status_bool": False,
+        "error": f"No job {job_id} in this session"
+    }), 404
 
 
 @app.route("/api")
@@ -148,10 +648,76 @@ def api():
             "/api/choose_solution",
             "/api/pass_sweeper",
             "/api/verify_fixed",
-            "/api/perform_sweep"
-        ]
+            "/api/perform_sweep",
+            "/api/perform_grid_sweep",
+            "/api/pipeline",
+            "/api/pipeline/batch",
+            "/api/jobs/<job_id>",
+            "/api/metrics",
+            "/api/profiles"
+        ],
+        "renderer": renderer.stats(),
+        "plot_cache": plot_cache.stats(),
+        "kernels": solver_module.KERNEL_CACHE.stats(),
+        "solve_pool": solve_pool.stats() if solve_pool is not None else None,
+        "jobs": job_manager.stats(),
+        "warmup": warmup_stats
     })
 
+@app.route("/api/metrics")
+def metrics():
+    """Stage and request latency histograms plus cache counters, in the Prometheus text format."""
+    caches = {
+        "solve": solver_module.SOLVE_CACHE.stats(),
+        "compiled": solver_module.COMPILED_CACHE.stats(),
+        "tokens": solver_module.TOKEN_CACHE.stats(),
+        "plot": plot_cache.stats()
+    }
+    gauges = {
+        "math_solver_cache_hits": ("Cache hits since start", "cache", {name: stats["hits"] for name, stats in caches.items()}),
+        "math_solver_cache_misses": ("Cache misses since start", "cache", {name: stats["misses"] for name, stats in caches.items()}),
+        "math_solver_cache_entries": ("Entries currently cached", "cache", {name: stats["size"] for name, stats in caches.items()})
+    }
+    return Response(render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/profiles")
+def list_profiles():
+    error_response = _profile_admin_error()
+    if error_response is not None:
+        return error_response
+    return jsonify({
+        "status": "success",
+        "status_bool": True,
+        "profiles": [profile.to_dict() for profile in profile_store.list()],
+        "error": ""
+    })
+
+@app.route("/api/profiles/<profile_id>")
+def download_profile(profile_id):
+    error_response = _profile_admin_error()
+    if error_response is not None:
+        return error_response
+
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        return jsonify({"status": "error", "status_bool": False, "error": f"No profile {profile_id}"}), 404
+
+    response_format = request.args.get("format", "pstats")
+    if response_format == "pstats":
+        body, mimetype, extension = profile.to_pstats(), "application/octet-stream", "prof"
+    elif response_format == "collapsed":
+        body, mimetype, extension = profile.to_collapsed(), "text/plain", "collapsed.txt"
+    else:
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": f"format must be pstats or collapsed, we got {response_format}"
+        }), 400
+
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=profile-{profile_id}.{extension}"
+    return response
+
 @app.route("/api/set_formula", methods=["POST"])
 @require_json
 @require_body
@@ -178,7 +744,7 @@ def set_formula():
         
         #DEBUG_MODE - Remove in production
         if app.debug:
-            sf_result["debug_session"] = "cookie"
+            sf_result["debug_session"] = session_store.name
         
         return jsonify(sf_result), 200
         
@@ -209,7 +775,9 @@ def set_formula():
 def solve_for_target():
     """
     Solve for a target variable
-    Expects: {"target": "S"}
+    Expects: {"target": "S", "numeric_fallback": false (optional)}
+    With numeric_fallback, a formula with no closed form comes back as status "numeric"
+    and is root-found point by point during sweeps.
     Returns: {status, solutions, needs_choice, etc.}
     """
     try:
@@ -233,8 +801,20 @@ def solve_for_target():
             return jsonify(error), 400
         
         target = request.json["target"]
-        sft_response = solver.solve_for_target(target)
+        numeric_fallback = request.json.get("numeric_fallback", False)
+
+        if not isinstance(numeric_fallback, bool):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"numeric_fallback must be bool, we got {type(numeric_fallback).__name__}"
+            }), 400
+
+        sft_response = solver.solve_for_target(target, numeric_fallback=numeric_fallback)
         
+        if sft_response["status"] == "busy":
+            return jsonify(sft_response), 503, {"Retry-After": "1"}
+
         if not sft_response["status_bool"]:
             return jsonify(sft_response), 400
         
@@ -242,7 +822,7 @@ def solve_for_target():
         
         #DEBUG_MODE - Remove in production
         if app.debug:
-            sft_response["debug_session"] = "cookie"
+            sft_response["debug_session"] = session_store.name
         
         return jsonify(sft_response), 200
         
@@ -355,7 +935,7 @@ def choose_solution():
         
         #DEBUG_MODE - Remove in production
         if app.debug:
-            cs_response["debug_session"] = "cookie"
+            cs_response["debug_session"] = session_store.name
         
         return jsonify(cs_response), 200
         
@@ -480,7 +1060,7 @@ def pass_sweeper():
 
         #DEBUG_MODE - Remove in production
         if app.debug:
-            response["debug_session"] = "cookie"
+            response["debug_session"] = session_store.name
         
         return jsonify(response), 200
         
@@ -589,7 +1169,7 @@ def verify_fixed():
         
         #DEBUG_MODE - Remove in production
         if app.debug:
-            response["debug_session"] = "cookie"
+            response["debug_session"] = session_store.name
         
         return jsonify(response), 200
         
@@ -644,9 +1224,20 @@ def verify_fixed():
 @require_types(start=(float, int), end=(float, int), steps=(float, int))
 def perform_sweep():
     """
-    Perform sweep and return plot
-    Expects: {"start": 0, "end": 100, "steps": 50}
-    Returns: PNG image
+    Perform sweep and return plot or raw data
+    Expects: {"start": 0, "end": 100, "steps": 50,
+              "format": "png" | "json" | "binary" | "ndjson" | "sse" (optional, default "png"),
+              "mode": "uniform" | "adaptive" (optional, default "uniform"),
+              "tolerance": 0.001 (optional, adaptive only),
+              "fixed_sets": [{"v": 5}, {"v": 10}] (optional, uniform only),
+              "branches": "chosen" | "all" (optional, default "chosen"),
+              "async": true (optional, png or json only)}
+    In adaptive mode `steps` is the evaluation budget.
+    With fixed_sets every set of fixed values is swept over the same grid and drawn as one line each.
+    With branches "all" every solution of the target is swept with the current sweeper and fixed values,
+    one line (or JSON branch) each.
+    With async the sweep runs in the background: 202 with a job id to poll at /api/jobs/<job_id>.
+    Returns: PNG image, JSON arrays or a little-endian float64 binary payload
     """
     try:
         solver, error = get_solver_from_session()
@@ -656,6 +1247,86 @@ def perform_sweep():
         start = request.json["start"]
         end = request.json["end"]
         steps = int(request.json["steps"])
+        response_format = request.json.get("format", "png")
+
+        if response_format not in SWEEP_FORMATS:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"format must be one of {', '.join(SWEEP_FORMATS)}, we got {response_format}"
+            }), 400
+
+        mode = request.json.get("mode", "uniform")
+        tolerance = request.json.get("tolerance", 1e-3)
+
+        if mode not in SWEEP_MODES:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"mode must be one of {', '.join(SWEEP_MODES)}, we got {mode}"
+            }), 400
+
+        if isinstance(tolerance, bool) or not isinstance(tolerance, (float, int)) or tolerance <= 0:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": "tolerance must be a positive number"
+            }), 400
+
+        fixed_sets = request.json.get("fixed_sets")
+
+        if fixed_sets is not None and not isinstance(fixed_sets, list):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"fixed_sets must be list, we got {type(fixed_sets).__name__}"
+            }), 400
+
+        if response_format in STREAM_FORMATS and (mode != "uniform" or fixed_sets is not None):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"{response_format} streaming only works with uniform mode and without fixed_sets"
+            }), 400
+
+        branches = request.json.get("branches", "chosen")
+
+        if branches not in SWEEP_BRANCHES:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"branches must be one of {', '.join(SWEEP_BRANCHES)}, we got {branches}"
+            }), 400
+
+        async_job = request.json.get("async", False)
+
+        if not isinstance(async_job, bool):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"async must be bool, we got {type(async_job).__name__}"
+            }), 400
+
+        if async_job and response_format not in ("png", "json"):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": "async only works with png or json format"
+            }), 400
+
+        if fixed_sets is not None and mode != "uniform":
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": "fixed_sets only works with uniform mode"
+            }), 400
+
+        if branches == "all" and (mode != "uniform" or fixed_sets is not None or async_job or response_format in STREAM_FORMATS):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": "branches all only works with uniform mode and png, json or binary format, without fixed_sets or async"
+            }), 400
         
         if steps < 2:
             return jsonify({
@@ -664,6 +1335,14 @@ def perform_sweep():
                 "error": "steps must be at least 2"
             }), 400
         
+        points = steps * len(fixed_sets) if fixed_sets else steps
+        if response_format not in STREAM_FORMATS and points > solver_module.SWEEP_MAX_POINTS:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"sweep has {points} points, the limit is {solver_module.SWEEP_MAX_POINTS}"
+            }), 400
+
         if start >= end:
             return jsonify({
                 "status": "error",
@@ -671,14 +1350,74 @@ def perform_sweep():
                 "error": "start must be less than end"
             }), 400
             
-        if not solver.solved_expression:
+        if solver.solved_expression is None and not solver.is_numeric:
             return jsonify({
                 "status": "error",
                 "status_bool": False,
                 "error": "No solution set. Complete previous steps first (set_formula, solve_for_target, etc.)"
             }), 400
         
-        sweep_response = solver.perform_sweep(start, end, steps)
+        if solver.sweeper and solver.sweeper != "const":
+            x_label = solver.sweeper
+        else:
+            x_label = "x"
+        download_name = f'{solver.target_variable or "result"}_vs_{x_label}.png'
+
+        etag = None
+        cached_png = None
+        if response_format == "png":
+            etag = _sweep_cache_key(solver, start, end, steps, mode, tolerance, fixed_sets, branches)
+            # Before any async submission, so a cached plot never queues behind real sweeps
+            if request.if_none_match.contains(etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(etag)
+                return not_modified
+
+            cached_png = plot_cache.get(etag)
+            if cached_png is not None and not async_job:
+                return _png_response(cached_png, etag, download_name)
+
+        if async_job:
+            if cached_png is not None:
+                # Keep the 202 contract, but the job has nothing left to compute
+                def work(job):
+                    return cached_png
+            else:
+                work = _sweep_job_work(solver, start, end, steps, mode, tolerance, fixed_sets, response_format, x_label, etag)
+            try:
+                job = job_manager.submit(session["session_id"], "sweep", work)
+            except JobLimitError as e:
+                return jsonify({
+                    "status": "error",
+                    "status_bool": False,
+                    "error": str(e)
+                }), 429
+            response = jsonify({
+                "status": "accepted",
+                "status_bool": True,
+                "job_id": job.id,
+                "status_url": f"/api/jobs/{job.id}",
+                "error": ""
+            })
+            response.status_code = 202
+            response.headers["Location"] = f"/api/jobs/{job.id}"
+            return response
+
+        if response_format in STREAM_FORMATS:
+            return _stream_sweep_response(solver, start, end, steps, response_format, x_label)
+
+        if fixed_sets is not None:
+            return _family_sweep_response(
+                solver, start, end, steps, fixed_sets, response_format, x_label, etag, download_name
+            )
+
+        if branches == "all":
+            return _branch_sweep_response(solver, start, end, steps, response_format, x_label, etag, download_name)
+
+        if mode == "adaptive":
+            sweep_response = solver.perform_adaptive_sweep(start, end, steps, tolerance)
+        else:
+            sweep_response = solver.perform_sweep(start, end, steps)
         
         if sweep_response["status"] != "success":
             return jsonify({
@@ -692,51 +1431,299 @@ def perform_sweep():
         x_values = sweep_response["x_values"]
         y_values = sweep_response["y_values"]
         skipped = sweep_response["skipped"]
+        poles = sweep_response.get("poles", [])
+
+        if response_format == "json":
+            return jsonify({
+                "status": "success",
+                "status_bool": True,
+                "x_values": x_values,
+                "y_values": y_values,
+                "skipped": skipped,
+                "poles": poles,
+                "mode": mode,
+                "x_label": x_label,
+                "y_label": solver.target_variable or "y",
+                "is_const": sweep_response["is_const"],
+                "error": ""
+            }), 200
+
+        if response_format == "binary":
+            return Response(
+                _encode_sweep_binary(x_values, y_values, skipped),
+                mimetype="application/octet-stream"
+            )
     
-        if solver.sweeper and solver.sweeper != "const":
-            x_label = solver.sweeper
-        else:
-            x_label = "x"
-    
-        plt.figure(figsize=(10, 6))
-        plt.plot(x_values, y_values, 'b-', linewidth=2)
-        plt.xlabel(x_label, fontsize=12)
-        plt.ylabel(solver.target_variable or "y", fontsize=12)
-        plt.title(f'{solver.target_variable or "y"} vs {x_label}', fontsize=14, fontweight='bold')
-        plt.grid(True, alpha=0.3)
-      
-        if len(skipped) > 0:
-            plt.text(0.02, 0.98, f'Skipped points: {len(skipped)}',
-                    transform=plt.gca().transAxes,
-                    verticalalignment='top',
-                    bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
-        
-        img_io = BytesIO()
-        plt.savefig(img_io, format='png', dpi=150, bbox_inches='tight')
-        img_io.seek(0)
-        plt.close()
+        png = renderer.render_line(
+            x_values,
+            y_values,
+            x_label,
+            solver.target_variable or "y",
+            skipped_count=len(skipped),
+            breaks=poles
+        )
+        plot_cache.put(etag, png)
+        return _png_response(png, etag, download_name)
         
+    except KeyError as e:
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": f"Missing key: {str(e)}"
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
+
+@app.route("/api/perform_grid_sweep", methods=["POST"])
+@require_json
+@require_body
+@require_fields("x_sweeper", "y_sweeper", "x_start", "x_end", "x_steps", "y_start", "y_end", "y_steps")
+@require_not_null("x_sweeper", "y_sweeper", "x_start", "x_end", "x_steps", "y_start", "y_end", "y_steps")
+@require_types(
+    x_sweeper=str, y_sweeper=str,
+    x_start=(float, int), x_end=(float, int), x_steps=(float, int),
+    y_start=(float, int), y_end=(float, int), y_steps=(float, int)
+)
+def perform_grid_sweep():
+    """
+    Sweep two variables over a mesh and return a heatmap or the raw grid
+    Expects: {"x_sweeper": "t", "y_sweeper": "v", "x_start": 0, "x_end": 10, "x_steps": 200,
+              "y_start": 0, "y_end": 5, "y_steps": 100, "fixed": {"a": 1} (every other variable),
+              "format": "png" | "json" | "binary" (optional), "plot": "heatmap" | "contour" (optional)}
+    Returns: PNG image, JSON grid or a little-endian float64 binary payload
+    """
+    try:
+        solver, error = get_solver_from_session()
+        if error:
+            return jsonify(error), 400
+
+        data = request.json
+        fixed = data.get("fixed") or {}
+        response_format = data.get("format", "png")
+        plot = data.get("plot", "heatmap")
+
+        if not isinstance(fixed, dict):
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"fixed must be dict, we got {type(fixed).__name__}"
+            }), 400
+
+        if response_format not in GRID_FORMATS:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"format must be one of {', '.join(GRID_FORMATS)}, we got {response_format}"
+            }), 400
+
+        if plot not in GRID_PLOTS:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"plot must be one of {', '.join(GRID_PLOTS)}, we got {plot}"
+            }), 400
+
+        x_sweeper = data["x_sweeper"]
+        y_sweeper = data["y_sweeper"]
+        grid_response = solver.perform_grid_sweep(
+            x_sweeper,
+            y_sweeper,
+            (data["x_start"], data["x_end"], int(data["x_steps"])),
+            (data["y_start"], data["y_end"], int(data["y_steps"])),
+            fixed
+        )
+
+        if grid_response["status"] != "success":
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": grid_response["error"]
+            }), 400
+
+        x_grid = grid_response["x_grid"]
+        y_grid = grid_response["y_grid"]
+        z_grid = grid_response["z_grid"]
+        z_label = solver.target_variable or "z"
+
+        if response_format == "json":
+            return jsonify({
+                "status": "success",
+                "status_bool": True,
+                "x_values": x_grid.tolist(),
+                "y_values": y_grid.tolist(),
+                "z_values": np.where(np.isnan(z_grid), None, z_grid).tolist(),
+                "skipped_count": grid_response["skipped_count"],
+                "x_label": x_sweeper,
+                "y_label": y_sweeper,
+                "z_label": z_label,
+                "error": ""
+            }), 200
+
+        if response_format == "binary":
+            return Response(
+                _encode_grid_binary(x_grid, y_grid, z_grid),
+                mimetype="application/octet-stream"
+            )
+
+        png = renderer.render_heatmap(
+            x_grid,
+            y_grid,
+            z_grid,
+            x_sweeper,
+            y_sweeper,
+            z_label,
+            contours=(plot == "contour"),
+            skipped_count=grid_response["skipped_count"]
+        )
         return send_file(
-            img_io,
+            BytesIO(png),
             mimetype='image/png',
             as_attachment=False,
-            download_name=f'{solver.target_variable or "result"}_vs_{x_label}.png'
+            download_name=f'{z_label}_over_{x_sweeper}_{y_sweeper}.png'
         )
-        
+
     except KeyError as e:
         return jsonify({
             "status": "error",
             "status_bool": False,
             "error": f"Missing key: {str(e)}"
         }), 400
-    
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Poll a background job of this session
+    Returns: {job_id, status, progress, error, result (json jobs), result_url (png jobs), ...}
+    """
+    job = job_manager.get(job_id, session.get("session_id"))
+    if job is None:
+        return _job_not_found(job_id)
+    return _job_response(job)
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    """The finished job's body exactly as the synchronous request would have returned it"""
+    job = job_manager.get(job_id, session.get("session_id"))
+    if job is None:
+        return _job_not_found(job_id)
+
+    if job.status != "succeeded":
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "error": f"job is {job.status}, no result to fetch"
+        }), 409
+
+    if isinstance(job.result, bytes):
+        return send_file(BytesIO(job.result), mimetype="image/png", download_name=f"{job.id}.png")
+    return jsonify({"status": "success", "status_bool": True, **job.result, "error": ""}), 200
+
+
+@app.route("/api/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """Cancel a queued or running job; running sweeps stop at their next chunk"""
+    job = job_manager.cancel(job_id, session.get("session_id"))
+    if job is None:
+        return _job_not_found(job_id)
+    return _job_response(job)
+
+
+@app.route("/api/pipeline", methods=["POST"])
+@require_json
+@require_body
+def pipeline():
+    """
+    Run the whole set_formula -> perform_sweep flow in one request
+    Expects: {"formula_string": "S = v*t", "target": "S", "index": 0 (if several solutions),
+              "sweeper": "t", "fixed": {"v": 2}, "start": 0, "end": 10, "steps": 50,
+              "numeric_fallback", "mode", "tolerance" (optional, as in the single-step endpoints),
+              "plot": true (optional, adds a base64 PNG)}
+    The finished solver is stored in the session, so later single-step calls carry on from it.
+    Returns: {status, steps: {<step>: <its usual response>}, failed_step, sweep, error}
+    """
+    try:
+        result, solver = _pipeline_result(request.json)
+
+        if not result["status_bool"]:
+            if result["status"] == "busy":
+                return jsonify(result), 503, {"Retry-After": "1"}
+            return jsonify(result), 400
+
+        save_solver_to_session(solver)
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "status_bool": False,
+            "steps": {},
+            "failed_step": None,
+            "sweep": None,
+            "error": f"Server error: {str(e)}"
+        }), 500
+
+
+@app.route("/api/pipeline/batch", methods=["POST"])
+@require_json
+@require_body
+@require_fields("jobs")
+@require_not_null("jobs")
+@require_types(jobs=list)
+def pipeline_batch():
+    """
+    Run several independent pipeline jobs in one request; the session is not touched
+    Expects: {"jobs": [<pipeline body>, ...]}
+    Returns: {status, results: [<pipeline result>, ...], succeeded, failed}
+    """
+    try:
+        jobs = request.json["jobs"]
+
+        if not jobs or len(jobs) > app.config['PIPELINE_BATCH_MAX_JOBS']:
+            return jsonify({
+                "status": "error",
+                "status_bool": False,
+                "error": f"jobs must hold between 1 and {app.config['PIPELINE_BATCH_MAX_JOBS']} jobs, we got {len(jobs)}"
+            }), 400
+
+        results = [_batch_job_result(job) for job in jobs]
+        succeeded = sum(1 for result in results if result["status_bool"])
+
+        return jsonify({
+            "status": "success",
+            "status_bool": True,
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "error": ""
+        }), 200
+
     except Exception as e:
         return jsonify({
             "status": "error",
             "status_bool": False,
+            "results": [],
             "error": f"Server error: {str(e)}"
         }), 500
 
 
 if __name__ == '__main__':
+    if app.config['WARMUP_FILE'] or app.config['WARMUP_TOP']:
+        preload()
+    if solve_pool is not None:
+        solve_pool.start()
     app.run(host="0.0.0.0", debug=True, port=5000)
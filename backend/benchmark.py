@@ -0,0 +1,292 @@
+"""
+Benchmarks for the solver and API hot paths.
+
+    python benchmark.py                                # run everything, print a table
+    python benchmark.py --filter sweep --repeat 5      # only benchmarks whose name contains "sweep"
+    python benchmark.py --json results.json            # also write machine-readable results
+    python benchmark.py --compare baseline.json        # run now and compare against an earlier run
+    python benchmark.py --compare old.json --against new.json   # compare two saved runs
+
+With --compare the exit status is 1 when any benchmark's median got slower than --threshold
+(default 10%), so it can gate a deploy.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, NamedTuple, Optional
+
+import solver as solver_module
+from solver import FormulaSolver
+
+RESULTS_VERSION = 1
+
+# (formula_string, target) pairs; "hard" ones make sympy work for a while
+EASY_FORMULAS = (
+    ("S = v*t", "S"),
+    ("F = m*a", "m"),
+    ("y = a*x**2", "x"),
+    ("E = m*c**2", "c"),
+    ("V = 4/3*pi*r**3", "r"),
+)
+HARD_FORMULAS = (
+    ("y = x**3 + a*x**2 + b*x + c", "x"),
+    ("y = x*exp(x)", "x"),
+    ("y = a*sin(x) + b*cos(x)", "x"),
+    ("y = sqrt(x + a) + sqrt(x)", "x"),
+    ("y = a*x**4 + x", "x"),
+)
+SWEEP_FORMULA = "y = a*sin(x)*x**2 + b/(x + 2)"
+# Three roots sharing the cubic's discriminant, for sweeping all branches at once
+BRANCH_FORMULA = "y = x**3 + a*x**2 + b*x + c"
+SWEEP_STEPS = {"100": 100, "10k": 10_000, "1M": 1_000_000}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Returns (run, reset): run() is timed, reset() (or None) restores the cold state before each run untimed
+    setup: Callable[[], tuple[Callable[[], object], Optional[Callable[[], None]]]]
+    # Upper bound on timed runs, for benchmarks too slow to repeat many times
+    max_repeat: Optional[int] = None
+
+
+def _sweep_solver(steps: int = 2) -> FormulaSolver:
+    solver = FormulaSolver()
+    solver.set_formula(SWEEP_FORMULA)
+    solver.solve_for_target("y")
+    solver.pass_sweeper("x")
+    solver.verify_fixed({"a": 1.5, "b": 0.5})
+    solver.perform_sweep(0.0, 10.0, steps)
+    return solver
+
+
+def _set_formula():
+    def run():
+        for formula_string, _ in EASY_FORMULAS + HARD_FORMULAS:
+            FormulaSolver().set_formula(formula_string)
+    return run, solver_module.TOKEN_CACHE.clear
+
+
+def _solve(formulas, cold: bool):
+    solvers = []
+
+    def reset():
+        solvers[:] = []
+        for formula_string, _ in formulas:
+            solver = FormulaSolver()
+            solver.set_formula(formula_string)
+            solvers.append(solver)
+        if cold:
+            solver_module.SOLVE_CACHE.memory.clear()
+
+    def run():
+        for solver, (_, target) in zip(solvers, formulas):
+            solver.solve_for_target(target)
+    return run, reset
+
+
+def _sweep(steps: int):
+    solver = _sweep_solver()
+    return (lambda: solver.perform_sweep(0.0, 10.0, steps)), None
+
+
+def _branch_sweep(steps: int):
+    solver = FormulaSolver()
+    solver.set_formula(BRANCH_FORMULA)
+    solver.solve_for_target("x")
+    solver.choose_solution(0)
+    solver.pass_sweeper("y")
+    solver.verify_fixed({"a": 1.0, "b": -2.0, "c": 0.5})
+    return (lambda: solver.perform_branch_sweep(-5.0, 5.0, steps)), None
+
+
+def _sweep_compile():
+    solver = _sweep_solver()
+    return (lambda: solver.perform_sweep(0.0, 10.0, 100)), solver_module.COMPILED_CACHE.clear
+
+
+def _round_trip(steps: int):
+    # What a session store does on every request: serialize, store as JSON, load and rebuild
+    solver = _sweep_solver(steps)
+    return (lambda: FormulaSolver.from_dict(json.loads(json.dumps(solver.to_dict())))), None
+
+
+# (endpoint, body) of the single-step flow; each API benchmark first replays the steps before its own
+API_FLOW = (
+    ("/api/set_formula", {"formula_string": "y = a*x**2 + b"}),
+    ("/api/solve_for_target", {"target": "x"}),
+    ("/api/choose_solution", {"index": 1}),
+    ("/api/pass_sweeper", {"sweeper": "y"}),
+    ("/api/verify_fixed", {"fixed": {"a": 2, "b": 1}}),
+)
+API_REQUESTS = (
+    *API_FLOW,
+    ("/api/perform_sweep", {"start": 1, "end": 10, "steps": 1000, "format": "json"}),
+    ("/api/perform_sweep", {"start": 1, "end": 10, "steps": 1000, "format": "png"}),
+    ("/api/perform_sweep", {"start": 1, "end": 10, "steps": 1000, "format": "binary"}),
+)
+
+
+def _api_request(position: int):
+    from app import app, plot_cache
+
+    # Importing the app may have configured a SolvePool from the environment
+    solver_module.configure_solve_pool(None)
+    app.config["TESTING"] = True
+    client = app.test_client()
+    endpoint, body = API_REQUESTS[position]
+    for prerequisite in API_FLOW[:min(position, len(API_FLOW))]:
+        client.post(prerequisite[0], json=prerequisite[1])
+
+    def run():
+        response = client.post(endpoint, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    # Rendered plots are cached by content; clear so every run draws
+    return run, plot_cache.clear
+
+
+def _api_name(endpoint: str, body: dict) -> str:
+    name = "api" + endpoint[len("/api"):]
+    return f"{name}/{body['format']}" if "format" in body else name
+
+
+BENCHMARKS = (
+    Benchmark("set_formula", _set_formula),
+    Benchmark("solve_for_target/easy", lambda: _solve(EASY_FORMULAS, cold=True)),
+    Benchmark("solve_for_target/hard", lambda: _solve(HARD_FORMULAS, cold=True), max_repeat=3),
+    Benchmark("solve_for_target/cached", lambda: _solve(EASY_FORMULAS + HARD_FORMULAS, cold=False)),
+    Benchmark("perform_sweep/compile", _sweep_compile),
+    *(Benchmark(f"perform_sweep/{label}", lambda steps=steps: _sweep(steps), max_repeat=5 if steps >= 1_000_000 else None)
+      for label, steps in SWEEP_STEPS.items()),
+    Benchmark("perform_branch_sweep/10k", lambda: _branch_sweep(10_000)),
+    Benchmark("round_trip/100", lambda: _round_trip(100)),
+    Benchmark("round_trip/10k", lambda: _round_trip(10_000)),
+    *(Benchmark(_api_name(endpoint, body), lambda position=position: _api_request(position))
+      for position, (endpoint, body) in enumerate(API_REQUESTS)),
+)
+
+
+def measure(run: Callable[[], object], reset: Optional[Callable[[], None]], repeat: int) -> list[float]:
+    """One untimed warm-up run, then `repeat` timed runs with the garbage collector off (like timeit)."""
+    if reset is not None:
+        reset()
+    run()
+    timings = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        finally:
+            if gc_enabled:
+                gc.enable()
+    return timings
+
+
+def run_benchmarks(name_filter: str = "", repeat: int = 10) -> dict:
+    """Run every benchmark whose name contains `name_filter`; returns the results document."""
+    # Keep the run independent of whatever the environment configured for serving
+    solver_module.SOLVE_CACHE.configure_directory(None)
+    solver_module.configure_solve_pool(None)
+
+    results = {}
+    for benchmark in BENCHMARKS:
+        if name_filter not in benchmark.name:
+            continue
+        run, reset = benchmark.setup()
+        timings = measure(run, reset, min(repeat, benchmark.max_repeat or repeat))
+        results[benchmark.name] = {
+            "runs": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0
+        }
+    return {"version": RESULTS_VERSION, "environment": _environment(), "results": results}
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> list[dict]:
+    """
+    Median change of every benchmark present in both runs. "verdict" is "slower" or "faster"
+    when the change exceeds `threshold` (a fraction) either way, otherwise "same".
+    """
+    rows = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = new["median"] / old["median"] - 1 if old["median"] > 0 else 0.0
+        verdict = "slower" if change > threshold else "faster" if change < -threshold else "same"
+        rows.append({"name": name, "baseline": old["median"], "current": new["median"], "change": change, "verdict": verdict})
+    return rows
+
+
+def _environment() -> dict:
+    import numpy
+    import sympy
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "sympy": sympy.__version__,
+        "timestamp": time.time()
+    }
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the solver and API hot paths.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per benchmark (default 10)")
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against the results in BASELINE")
+    parser.add_argument("--against", metavar="RESULTS", help="with --compare, use these saved results instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1, help="median change counted as a regression (default 0.1)")
+    args = parser.parse_args(argv)
+
+    if args.against:
+        with open(args.against, encoding="utf-8") as file:
+            current = json.load(file)
+    else:
+        current = run_benchmarks(args.filter, args.repeat)
+        for name, result in current["results"].items():
+            print(f"{name:32} median {_format_seconds(result['median']):>12}   min {_format_seconds(result['min']):>12}   runs {result['runs']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as file:
+        baseline = json.load(file)
+    rows = compare_results(baseline, current, args.threshold)
+    print()
+    for row in rows:
+        print(f"{row['name']:32} {_format_seconds(row['baseline']):>12} -> {_format_seconds(row['current']):>12}"
+              f"   {row['change']:+7.1%}   {row['verdict']}")
+    regressions = [row["name"] for row in rows if row["verdict"] == "slower"]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe bounded mapping that evicts the least recently used entry.
+    Keeps hit/miss counters so callers can expose them as metrics.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = max(int(maxsize), 0)
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = max(int(maxsize), 0)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class BytesLRUCache:
+    """LRU cache of bytes values bounded by their total size rather than the entry count."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max(int(max_bytes), 0)
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._data[key] = value
+            self.total_bytes += len(value)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class SolveCache:
+    """
+    Two-tier cache for symbolic solve results.
+    The memory tier is a per-process LRUCache; the optional disk tier is a SQLite file
+    under `directory`, so results survive restarts and are shared between worker processes.
+    `dumps`/`loads` convert a cached value to and from the text stored on disk.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        directory: Optional[str] = None,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads
+    ):
+        self.memory = LRUCache(maxsize)
+        self.dumps = dumps
+        self.loads = loads
+        self.disk_hits = 0
+        self.disk_errors = 0
+        self.path: Optional[str] = None
+        self._local = local()
+        if directory:
+            self.configure_directory(directory)
+
+    def configure_directory(self, directory: Optional[str]) -> None:
+        """Enable (or with None, disable) the on-disk tier."""
+        self._local = local()
+        if not directory:
+            self.path = None
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "solve_cache.sqlite3")
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS solve_cache ("
+                "key TEXT PRIMARY KEY, formula_string TEXT, target TEXT, "
+                "value TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+            )
+
+    def reset_connections(self) -> None:
+        """Forget this thread's SQLite connection, e.g. in a freshly forked worker that must not share it."""
+        self._local = local()
+
+    def get(self, key: tuple) -> Any:
+        value = self.memory.get(key)
+        if value is not None or self.path is None:
+            return value
+
+        digest = self._digest(key)
+        try:
+            with self._connect() as connection:
+                row = connection.execute("SELECT value FROM solve_cache WHERE key = ?", (digest,)).fetchone()
+                if row is None:
+                    return None
+                connection.execute("UPDATE solve_cache SET hits = hits + 1 WHERE key = ?", (digest,))
+            value = self.loads(row[0])
+        except (sqlite3.Error, ValueError, TypeError, SyntaxError):
+            self.disk_errors += 1
+            return None
+
+        self.disk_hits += 1
+        self.memory.put(key, value)
+        return value
+
+    def put(self, key: tuple, value: Any, formula_string: Optional[str] = None, target: Optional[str] = None) -> None:
+        self.memory.put(key, value)
+        if self.path is None:
+            return
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO solve_cache (key, formula_string, target, value, hits, updated_at) "
+                    "VALUES (?, ?, ?, ?, COALESCE((SELECT hits FROM solve_cache WHERE key = ?), 0), ?)",
+                    (self._digest(key), formula_string, target, self.dumps(value), self._digest(key), time.time())
+                )
+        except sqlite3.Error:
+            self.disk_errors += 1
+
+    def most_used(self, limit: int) -> list[tuple[str, str]]:
+        """(formula_string, target) of the disk entries with the most hits, most used first."""
+        if self.path is None or limit <= 0:
+            return []
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(
+                    "SELECT formula_string, target FROM solve_cache "
+                    "WHERE formula_string IS NOT NULL AND target IS NOT NULL "
+                    "ORDER BY hits DESC, updated_at DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+        except sqlite3.Error:
+            self.disk_errors += 1
+            return []
+        return [(formula_string, target) for formula_string, target in rows]
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk_hits = 0
+        self.disk_errors = 0
+        if self.path is None:
+            return
+        with self._connect() as connection:
+            connection.execute("DELETE FROM solve_cache")
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        stats.update({
+            "disk_enabled": self.path is not None,
+            "disk_hits": self.disk_hits,
+            "disk_errors": self.disk_errors
+        })
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't cross threads, so keep one per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _digest(key: tuple) -> str:
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
@@ -0,0 +1,144 @@
+import hashlib
+import importlib.util
+import os
+import tempfile
+from threading import Lock
+from typing import Callable, Optional
+
+from lazy import LazyModule
+
+sp = LazyModule("sympy")
+
+# Bump when the generated source changes shape so stale kernels on disk are no longer picked up
+CODEGEN_VERSION = 1
+KERNEL_FUNCTION = "kernel"
+
+
+def generate_source(arguments: list, expressions: list) -> str:
+    """
+    Python source of a module defining kernel(*arguments) that evaluates `expressions` with NumPy.
+    Common subexpressions are computed once into locals. A single expression is returned as is,
+    several as a tuple. Raises if an expression uses something NumPy can't print.
+    """
+    from sympy.printing.numpy import NumPyPrinter
+
+    # Plain positional names, so variables called e.g. "numpy" or "lambda" can't clash with the module
+    renamed = {symbol: sp.Symbol(f"_a{i}") for i, symbol in enumerate(arguments)}
+    expressions = [sp.sympify(expression).xreplace(renamed) for expression in expressions]
+    unknown = set().union(*(expression.free_symbols for expression in expressions)) - set(renamed.values())
+    if unknown:
+        raise ValueError(f"expression uses symbols that aren't arguments: {', '.join(sorted(map(str, unknown)))}")
+
+    replacements, reduced = sp.cse(expressions, symbols=sp.numbered_symbols("_cse"))
+    printer = NumPyPrinter({"fully_qualified_modules": True})
+    body = [f"    {symbol} = {printer.doprint(value)}" for symbol, value in replacements]
+    printed = [printer.doprint(expression) for expression in reduced]
+    body.append(f"    return {printed[0]}" if len(printed) == 1 else f"    return ({', '.join(printed)},)")
+
+    imports = [f"import {module}" for module in sorted(printer.module_imports)]
+    signature = ", ".join(str(renamed[symbol]) for symbol in arguments)
+    return "\n".join([
+        f"# Generated by codegen.py (version {CODEGEN_VERSION}), do not edit",
+        *imports,
+        "",
+        "",
+        f"def {KERNEL_FUNCTION}({signature}):",
+        *body,
+        ""
+    ])
+
+
+class KernelCache:
+    """
+    NumPy kernels generated by generate_source, kept as .py files under `directory` (keyed by a hash of
+    the expressions and argument names) so later processes import them instead of running cse again.
+    Without a directory kernels are compiled in memory every time.
+    Only point `directory` at a location as trusted as the code itself: its files are imported.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory: Optional[str] = None
+        self.generated = 0
+        self.disk_hits = 0
+        self.errors = 0
+        self._lock = Lock()
+        self.configure_directory(directory)
+
+    def configure_directory(self, directory: Optional[str]) -> None:
+        """Enable (or with None, disable) keeping kernels on disk."""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory or None
+
+    def load(self, arguments: list, expressions: list) -> Optional[Callable]:
+        """The kernel for `expressions` of `arguments` (sympy Symbols), or None if it can't be generated."""
+        key = "\n".join([str(CODEGEN_VERSION), sp.srepr(tuple(arguments)), *(sp.srepr(e) for e in expressions)])
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        path = os.path.join(self.directory, f"kernel_{digest}.py") if self.directory else None
+
+        if path is not None and os.path.exists(path):
+            try:
+                kernel = _import_kernel(path, digest)
+            except Exception:
+                # Half-written or from an incompatible version: regenerate below
+                kernel = None
+            if kernel is not None:
+                self._count("disk_hits")
+                return kernel
+
+        try:
+            source = generate_source(arguments, expressions)
+            if path is None:
+                namespace: dict = {}
+                exec(compile(source, f"<kernel {digest}>", "exec"), namespace)
+                kernel = namespace[KERNEL_FUNCTION]
+            else:
+                _write_atomically(path, source)
+                kernel = _import_kernel(path, digest)
+        except Exception:
+            self._count("errors")
+            return None
+
+        self._count("generated")
+        return kernel
+
+    def clear(self) -> None:
+        """Delete the kernels on disk."""
+        if self.directory is None:
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith("kernel_") and name.endswith(".py"):
+                os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "disk_enabled": self.directory is not None,
+                "generated": self.generated,
+                "disk_hits": self.disk_hits,
+                "errors": self.errors
+            }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _write_atomically(path: str, source: str) -> None:
+    # Other workers may import the same kernel concurrently: never let them see a partial file
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(source)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _import_kernel(path: str, digest: str) -> Callable:
+    # importlib also caches the bytecode in __pycache__, so later imports skip compiling the source
+    spec = importlib.util.spec_from_file_location(f"math_solver_kernel_{digest}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, KERNEL_FUNCTION)
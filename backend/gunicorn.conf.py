@@ -0,0 +1,23 @@
+# gunicorn -c gunicorn.conf.py app:app
+#
+# The master imports the app and its heavy dependencies once, then forks workers that share those
+# pages instead of each importing sympy and matplotlib on their first request.
+import os
+
+bind = os.environ.get("MATH_SOLVER_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("MATH_SOLVER_WORKERS", 2))
+threads = int(os.environ.get("MATH_SOLVER_THREADS", 4))
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before any worker is forked
+    import app
+    app.preload()
+
+
+def post_fork(server, worker):
+    # Solve workers belong to one web worker, so they are spawned after the fork, not in the master
+    import app
+    if app.solve_pool is not None:
+        app.solve_pool.start()
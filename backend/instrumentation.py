@@ -0,0 +1,166 @@
+import bisect
+import functools
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Optional
+
+# Upper bounds (seconds) of the cumulative histogram buckets, Prometheus style
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Rolling quantiles are computed over this many recent observations per label set
+ROLLING_WINDOW = 1024
+ROLLING_QUANTILES = (0.5, 0.9, 0.99)
+
+# (start time, [(stage, seconds), ...]) of the request being handled in this context, if any
+_current: ContextVar[Optional[tuple]] = ContextVar("math_solver_request_stages", default=None)
+
+
+class Histogram:
+    """
+    Thread-safe latency histogram keyed by label values.
+    Keeps cumulative bucket counts since start (for Prometheus rate/histogram_quantile queries)
+    and the last ROLLING_WINDOW observations for quick recent-quantile summaries.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict = {}
+        self._lock = Lock()
+
+    def observe(self, labels: tuple, seconds: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "count": 0,
+                    "sum": 0.0,
+                    "recent": deque(maxlen=ROLLING_WINDOW)
+                }
+            series["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+            series["count"] += 1
+            series["sum"] += seconds
+            series["recent"].append(seconds)
+
+    def summary(self) -> dict:
+        """{label values: {"count", "sum", "p50", "p90", "p99"}} over the rolling window, for JSON stats."""
+        with self._lock:
+            items = [(labels, series["count"], series["sum"], sorted(series["recent"])) for labels, series in self._series.items()]
+        return {
+            ",".join(labels): {"count": count, "sum": total, **{f"p{int(q * 100)}": _quantile(recent, q) for q in ROLLING_QUANTILES}}
+            for labels, count, total, recent in items
+        }
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        recent_lines = [f"# HELP {self.name}_recent {self.help_text} (last {ROLLING_WINDOW} observations)",
+                        f"# TYPE {self.name}_recent summary"]
+        with self._lock:
+            snapshot = [(labels, list(series["buckets"]), series["count"], series["sum"], sorted(series["recent"]))
+                        for labels, series in sorted(self._series.items())]
+
+        for labels, buckets, count, total, recent in snapshot:
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            separator = "," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), buckets):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text}{separator}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total!r}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+            for q in ROLLING_QUANTILES:
+                recent_lines.append(f'{self.name}_recent{{{label_text}{separator}quantile="{q}"}} {_quantile(recent, q)!r}')
+        return lines + recent_lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+STAGE_SECONDS = Histogram("math_solver_stage_seconds", "Time spent in one stage of request handling", ("stage",))
+REQUEST_SECONDS = Histogram(
+    "math_solver_request_seconds", "Total time to handle an /api request", ("endpoint", "method", "status")
+)
+
+
+def begin_request() -> None:
+    """Start collecting stages for the request handled in the current context."""
+    _current.set((time.perf_counter(), []))
+
+
+def end_request() -> tuple[float, list]:
+    """Stop collecting; returns (total seconds, [(stage, seconds), ...]) or (0.0, []) if nothing was begun."""
+    current = _current.get()
+    _current.set(None)
+    if current is None:
+        return 0.0, []
+    started, stages = current
+    return time.perf_counter() - started, stages
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as `name`, both for the current request's Server-Timing and STAGE_SECONDS."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe((name,), seconds)
+    current = _current.get()
+    if current is not None:
+        current[1].append((name, seconds))
+
+
+def server_timing_header(total: float, stages: list) -> str:
+    """Server-Timing value: one metric per stage name (repeated stages summed, in first-seen order) plus total."""
+    durations: dict = {}
+    for name, seconds in stages:
+        durations[name] = durations.get(name, 0.0) + seconds
+    metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in durations.items()]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics)
+
+
+def render_prometheus(gauges: Optional[dict] = None) -> str:
+    """
+    Both histograms in the Prometheus text exposition format, plus optional gauges given as
+    {metric name: (help text, label name, {label value: number})}.
+    """
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render()
+    for name, (help_text, label_name, values) in (gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for label_value, value in values.items():
+            lines.append(f'{name}{{{label_name}="{_escape(label_value)}"}} {value!r}')
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return float(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))])
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
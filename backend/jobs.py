@@ -0,0 +1,147 @@
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+from typing import Any, Callable, Optional
+
+
+class JobCancelledError(Exception):
+    """Raised by job work that noticed its cancel_event; the job ends as "cancelled"."""
+
+
+class JobLimitError(Exception):
+    """The owner already has as many unfinished jobs as the per-owner limit allows."""
+
+
+class Job:
+    """One unit of background work and its observable state."""
+
+    def __init__(self, owner: str, kind: str):
+        self.id = secrets.token_urlsafe(16)
+        self.owner = owner
+        self.kind = kind
+        self.status = "queued"
+        self.progress = 0.0
+        self.result: Any = None
+        self.error = ""
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = Event()
+        self.future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a shared thread pool and keeps their state for polling.
+    Each owner (a session id) may have at most `per_owner_limit` unfinished jobs, so one client
+    can't fill the pool. Finished jobs are kept for `ttl` seconds, at most `max_jobs` in total.
+    Work callables receive their Job and should update job.progress and check job.cancel_event.
+    """
+
+    def __init__(self, max_workers: int = 4, per_owner_limit: int = 2, ttl: int = 600, max_jobs: int = 1000):
+        self.per_owner_limit = per_owner_limit
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="math-solver-job")
+        self.max_workers = max_workers
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def submit(self, owner: str, kind: str, work: Callable[[Job], Any]) -> Job:
+        job = Job(owner, kind)
+        with self._lock:
+            self._purge(time.time())
+            active = sum(1 for other in self._jobs.values() if other.owner == owner and not other.finished)
+            if active >= self.per_owner_limit:
+                raise JobLimitError(f"at most {self.per_owner_limit} unfinished jobs per session, wait for one to finish or cancel it")
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id: str, owner: str) -> Optional[Job]:
+        """The job, or None if it doesn't exist or belongs to someone else."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def cancel(self, job_id: str, owner: str) -> Optional[Job]:
+        job = self.get(job_id, owner)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        # A job that hasn't started yet never will; a running one stops at its next cancel_event check
+        if job.future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "max_workers": self.max_workers,
+            "per_owner_limit": self.per_owner_limit,
+            "jobs": len(statuses),
+            **{status: statuses.count(status) for status in ("queued", "running", "succeeded", "failed", "cancelled")}
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: Job, work: Callable[[Job], Any]) -> None:
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = work(job)
+        except JobCancelledError:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+        else:
+            job.progress = 1.0
+            self._finish(job, "succeeded")
+
+    @staticmethod
+    def _finish(job: Job, status: str) -> None:
+        job.finished_at = time.time()
+        job.status = status
+
+    def _purge(self, now: float) -> None:
+        # Jobs are kept in submission order; only finished ones are ever dropped
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and job.finished_at + self.ttl <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
@@ -0,0 +1,38 @@
+import importlib
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a heavy module that is only imported on first attribute access,
+    so importing the backend stays cheap until a request actually needs sympy or matplotlib.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            # importlib holds the import lock, so concurrent first uses import once
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __dir__(self):
+        return dir(self.load())
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name__}' ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def preload(*modules: LazyModule) -> None:
+    """Import the given lazy modules now, e.g. in a pre-forking master so workers share the pages."""
+    for module in modules:
+        module.load()
@@ -0,0 +1,138 @@
+from typing import Optional
+
+import solver as solver_module
+from solver import FormulaSolver
+
+PIPELINE_MODES = ("uniform", "adaptive")
+
+# (field, accepted types, required)
+PIPELINE_FIELDS = (
+    ("formula_string", (str,), True),
+    ("target", (str,), True),
+    ("start", (float, int), True),
+    ("end", (float, int), True),
+    ("steps", (float, int), True),
+    ("numeric_fallback", (bool,), False),
+    ("index", (int,), False),
+    ("sweeper", (str,), False),
+    ("fixed", (dict,), False),
+    ("mode", (str,), False),
+    ("tolerance", (float, int), False),
+)
+
+
+def validate_job(job) -> Optional[str]:
+    """Same checks the single-step endpoints make with their decorators, as one error message (None if valid)."""
+    if not isinstance(job, dict) or not job:
+        return "Body is required"
+
+    for field, types, required in PIPELINE_FIELDS:
+        value = job.get(field)
+        if value is None:
+            if required:
+                return f"{field} is required" if field not in job else f"{field} cannot be null"
+            continue
+        # bool is an int subclass, only accept it where bool is asked for
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            type_name = " or ".join(t.__name__ for t in types)
+            return f"{field} must be {type_name}, we got {type(value).__name__}"
+
+    if _optional(job, "mode", "uniform") not in PIPELINE_MODES:
+        return f"mode must be one of {', '.join(PIPELINE_MODES)}, we got {job['mode']}"
+    if _optional(job, "tolerance", 1e-3) <= 0:
+        return "tolerance must be a positive number"
+    if int(job["steps"]) < 2:
+        return "steps must be at least 2"
+    if int(job["steps"]) > solver_module.SWEEP_MAX_POINTS:
+        return f"sweep has {int(job['steps'])} points, the limit is {solver_module.SWEEP_MAX_POINTS}"
+    if job["start"] >= job["end"]:
+        return "start must be less than end"
+    return None
+
+
+def run_pipeline(job: dict) -> tuple[dict, Optional[FormulaSolver]]:
+    """
+    Run set_formula → solve_for_target → choose_solution → pass_sweeper → verify_fixed → sweep
+    on one in-memory solver, skipping the steps the formula doesn't need.
+    Returns (result, solver): "steps" holds every step's own response, "failed_step" names the step
+    that stopped the run (None on success) and "sweep" the sweep output. solver is None if validation failed.
+    """
+    result = {
+        "status": "error",
+        "status_bool": False,
+        "steps": {},
+        "failed_step": None,
+        "sweep": None,
+        "error": ""
+    }
+
+    error = validate_job(job)
+    if error is not None:
+        result.update({"failed_step": "validate", "error": error})
+        return result, None
+
+    steps = result["steps"]
+    solver = FormulaSolver()
+
+    def failed(step: str, error: str) -> tuple[dict, FormulaSolver]:
+        result.update({"failed_step": step, "error": error})
+        return result, solver
+
+    steps["set_formula"] = solver.set_formula(job["formula_string"])
+    if not steps["set_formula"]["status_bool"]:
+        return failed("set_formula", steps["set_formula"]["error"])
+
+    steps["solve_for_target"] = solver.solve_for_target(job["target"], numeric_fallback=_optional(job, "numeric_fallback", False))
+    if not steps["solve_for_target"]["status_bool"]:
+        result["status"] = steps["solve_for_target"]["status"]
+        return failed("solve_for_target", steps["solve_for_target"]["error"])
+
+    if steps["solve_for_target"]["needs_choice"]:
+        if job.get("index") is None:
+            count = len(solver.solutions_list)
+            return failed("choose_solution", f"index is required, {job['target']} has {count} solutions")
+        steps["choose_solution"] = solver.choose_solution(job["index"])
+        if not steps["choose_solution"]["status_bool"]:
+            return failed("choose_solution", steps["choose_solution"]["error"])
+
+    if not solver.is_const:
+        if job.get("sweeper") is None:
+            return failed("pass_sweeper", f"sweeper is required, choose one of {solver.required_list_str}")
+        steps["pass_sweeper"] = solver.pass_sweeper(job["sweeper"])
+        if not steps["pass_sweeper"]["status_bool"]:
+            return failed("pass_sweeper", steps["pass_sweeper"]["error"])
+
+    if solver.is_multi_var:
+        steps["verify_fixed"] = solver.verify_fixed(job.get("fixed") or {})
+        if not steps["verify_fixed"]["is_fixed_correct"]:
+            return failed("verify_fixed", steps["verify_fixed"]["error"])
+
+    mode = _optional(job, "mode", "uniform")
+    if mode == "adaptive":
+        sweep = solver.perform_adaptive_sweep(job["start"], job["end"], int(job["steps"]), _optional(job, "tolerance", 1e-3))
+    else:
+        sweep = solver.perform_sweep(job["start"], job["end"], int(job["steps"]))
+    if sweep["status"] != "success":
+        return failed("perform_sweep", sweep["error"])
+
+    result.update({
+        "status": "success",
+        "status_bool": True,
+        "sweep": {
+            "x_values": sweep["x_values"],
+            "y_values": sweep["y_values"],
+            "skipped": sweep["skipped"],
+            "poles": sweep.get("poles", []),
+            "mode": mode,
+            "x_label": solver.sweeper if solver.sweeper and solver.sweeper != "const" else "x",
+            "y_label": solver.target_variable or "y",
+            "is_const": sweep["is_const"]
+        }
+    })
+    return result, solver
+
+
+def _optional(job: dict, field: str, default):
+    # null means "use the default", same as leaving the field out
+    value = job.get(field)
+    return default if value is None else value
@@ -0,0 +1,180 @@
+import cProfile
+import hashlib
+import hmac
+import marshal
+import os
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+# Signed profile requests are accepted this many seconds either side of their timestamp
+SIGNATURE_MAX_AGE = 300
+# Paths in the collapsed output stop at this depth (recursion is cut anyway)
+COLLAPSED_MAX_DEPTH = 64
+# Paths taking less than this share of the profiled time are not expanded in the collapsed output,
+# which keeps sympy's huge call graphs from exploding into millions of near-empty paths
+COLLAPSED_MIN_SHARE = 1e-4
+
+
+class RequestProfile:
+    """cProfile data of one profiled request."""
+
+    def __init__(self, method: str, path: str, endpoint: str, status: int, seconds: float, stats: dict):
+        self.id = secrets.token_urlsafe(8)
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.status = status
+        self.seconds = seconds
+        self.created_at = time.time()
+        # {(file, line, function): (primitive calls, calls, own time, cumulative time, callers)}, as in pstats
+        self.stats = stats
+
+    def to_dict(self) -> dict:
+        return {
+            "profile_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "seconds": self.seconds,
+            "created_at": self.created_at,
+            "functions": len(self.stats)
+        }
+
+    def to_pstats(self) -> bytes:
+        """Same bytes cProfile.Profile.dump_stats writes; load with pstats.Stats(path) or snakeviz."""
+        return marshal.dumps(self.stats)
+
+    def to_collapsed(self) -> str:
+        """
+        Collapsed stacks ("outer;inner;leaf microseconds" per line) for flamegraph.pl or speedscope.
+        cProfile only records caller → callee edges, so a function's time is split between the paths
+        leading to it in proportion to the time each caller spent in it. Subtrees under COLLAPSED_MIN_SHARE
+        are summed into an "[other]" frame below their caller. Recursion makes caller edges overlap,
+        so the result is scaled to add up to the profiled time.
+        """
+        callees: dict = {}
+        for function, (_, _, _, _, callers) in self.stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((function, edge[3]))
+        roots = [function for function, entry in self.stats.items() if not entry[4]]
+        total_micros = sum(entry[2] for entry in self.stats.values()) * 1e6
+        min_micros = max(1.0, total_micros * COLLAPSED_MIN_SHARE)
+
+        totals: dict = {}
+
+        def add(key: str, micros: float) -> None:
+            totals[key] = totals.get(key, 0.0) + micros
+
+        def walk(function, path: tuple, share: float) -> None:
+            path = (*path, _frame_name(function))
+            key = ";".join(path)
+            add(key, self.stats[function][2] * share * 1e6)
+            for callee, edge_cumulative in callees.get(function, ()):
+                callee_cumulative = self.stats[callee][3]
+                if _frame_name(callee) in path or callee_cumulative <= 0:
+                    continue
+                callee_share = share * edge_cumulative / callee_cumulative
+                if callee_cumulative * callee_share * 1e6 < min_micros or len(path) >= COLLAPSED_MAX_DEPTH:
+                    add(f"{key};[other]", callee_cumulative * callee_share * 1e6)
+                else:
+                    walk(callee, path, callee_share)
+
+        for root in roots:
+            walk(root, (), 1.0)
+        scale = total_micros / sum(totals.values()) if totals else 1.0
+        return "".join(f"{path} {round(micros * scale)}\n" for path, micros in totals.items() if round(micros * scale) > 0)
+
+
+class ProfileStore:
+    """The last `maxlen` request profiles, oldest dropped first."""
+
+    def __init__(self, maxlen: int = 20):
+        self.maxlen = maxlen
+        self._profiles: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.maxlen:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list[RequestProfile]:
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+class RequestProfiler:
+    """
+    Profiles one request at a time: cProfile can't run two profilers at once on Python 3.12+,
+    and concurrent requests would blur each other's numbers anyway.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """A running profiler, or None if another request is being profiled."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except Exception:
+            self._lock.release()
+            return None
+        return profiler
+
+    def stop(self, profiler: cProfile.Profile) -> dict:
+        try:
+            profiler.disable()
+            profiler.create_stats()
+            return profiler.stats
+        finally:
+            self._lock.release()
+
+
+def sign_request(secret: str, method: str, path: str, timestamp: Optional[int] = None) -> str:
+    """Value for the X-Profile header that asks the server to profile `method path`."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f"{timestamp}.{_signature(secret, timestamp, method, path)}"
+
+
+def verify_signature(secret: str, value: str, method: str, path: str, now: Optional[float] = None) -> bool:
+    if not secret or not value:
+        return False
+    timestamp, _, signature = value.partition(".")
+    try:
+        timestamp = int(timestamp)
+    except ValueError:
+        return False
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > SIGNATURE_MAX_AGE:
+        return False
+    return hmac.compare_digest(signature, _signature(secret, timestamp, method, path))
+
+
+def _signature(secret: str, timestamp: int, method: str, path: str) -> str:
+    message = f"{timestamp}:{method.upper()}:{path}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _frame_name(function: tuple) -> str:
+    file_name, line, name = function
+    if file_name == "~":
+        # Built-ins: ("~", 0, "<built-in method builtins.len>")
+        return name
+    return f"{os.path.basename(file_name)}:{line}({name})"
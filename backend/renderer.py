@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import time
+from io import BytesIO
+from threading import Lock, local
+
+import numpy as np
+
+from instrumentation import timed
+from lazy import LazyModule
+
+# matplotlib is only imported when the first figure is built
+backend_agg = LazyModule("matplotlib.backends.backend_agg")
+mpl_figure = LazyModule("matplotlib.figure")
+
+
+class _LinePlot:
+    """One pre-built figure/axes/line set, owned by a single thread and reused between renders."""
+
+    def __init__(self, figsize: tuple):
+        self.figure = mpl_figure.Figure(figsize=figsize)
+        backend_agg.FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.line, = self.axes.plot([], [], 'b-', linewidth=2)
+        self.axes.grid(True, alpha=0.3)
+        self.note = self.axes.text(
+            0.02, 0.98, "",
+            transform=self.axes.transAxes,
+            verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5),
+            visible=False
+        )
+
+
+class _MultiLinePlot:
+    """Pre-built figure for several curves on one axes; lines are created on demand and hidden when unused."""
+
+    def __init__(self, figsize: tuple):
+        self.figure = mpl_figure.Figure(figsize=figsize)
+        backend_agg.FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.lines = []
+        self.axes.grid(True, alpha=0.3)
+        self.note = self.axes.text(
+            0.02, 0.98, "",
+            transform=self.axes.transAxes,
+            verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5),
+            visible=False
+        )
+
+    def lines_for(self, count: int) -> list:
+        while len(self.lines) < count:
+            line, = self.axes.plot([], [], '-', linewidth=2)
+            self.lines.append(line)
+        for line in self.lines[count:]:
+            # relim() also counts hidden lines, so drop their old data
+            line.set_data([], [])
+            line.set_visible(False)
+        for line in self.lines[:count]:
+            line.set_visible(True)
+        return self.lines[:count]
+
+
+class _HeatmapPlot:
+    """Pre-built heatmap figure with a colorbar; the image data, extent and colour limits are swapped per render."""
+
+    def __init__(self, figsize: tuple):
+        self.figure = mpl_figure.Figure(figsize=figsize)
+        backend_agg.FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.image = self.axes.imshow(
+            np.zeros((2, 2)),
+            origin='lower',
+            aspect='auto',
+            interpolation='nearest',
+            cmap='viridis'
+        )
+        self.colorbar = self.figure.colorbar(self.image, ax=self.axes)
+        self.contours = None
+        self.note = self.axes.text(
+            0.02, 0.98, "",
+            transform=self.axes.transAxes,
+            verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5),
+            visible=False
+        )
+
+
+class PlotRenderer:
+    """
+    Thread-safe PNG renderer built on the object-oriented Figure/FigureCanvasAgg API.
+    Each thread keeps its own pre-built figure and only swaps line data between renders,
+    instead of going through the global pyplot state machine.
+    """
+
+    def __init__(self, figsize: tuple = (10, 6), dpi: int = 150):
+        self.figsize = figsize
+        self.dpi = dpi
+        self._local = local()
+        self._lock = Lock()
+        self._renders = 0
+        self._figures_built = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._last_seconds = 0.0
+
+    @timed("render")
+    def render_line(self, x_values, y_values, x_label: str, y_label: str, skipped_count: int = 0, breaks=()) -> bytes:
+        """Draw y against x; `breaks` are x positions (e.g. poles) the line must not be drawn across."""
+        started = time.perf_counter()
+        plot = self._line_plot()
+
+        if len(breaks) > 0:
+            x_values, y_values = self._split_at(x_values, y_values, breaks)
+        plot.line.set_data(x_values, y_values)
+        self._rescale(plot.axes, len(x_values) > 0)
+        plot.axes.set_xlabel(x_label, fontsize=12)
+        plot.axes.set_ylabel(y_label, fontsize=12)
+        plot.axes.set_title(f'{y_label} vs {x_label}', fontsize=14, fontweight='bold')
+
+        plot.note.set_text(f'Skipped points: {skipped_count}')
+        plot.note.set_visible(skipped_count > 0)
+
+        png = self._to_png(plot.figure)
+        self._record(time.perf_counter() - started)
+        return png
+
+    @timed("render")
+    def render_lines(self, x_values, y_rows, labels: list[str], x_label: str, y_label: str,
+                     skipped_count: int = 0) -> bytes:
+        """Draw several curves over the same x values (NaN in a row leaves a gap) with a legend."""
+        started = time.perf_counter()
+        plot = self._multi_line_plot()
+
+        lines = plot.lines_for(len(y_rows))
+        for line, y_values, label in zip(lines, y_rows, labels):
+            line.set_data(x_values, y_values)
+            line.set_label(label)
+        has_data = any(np.isfinite(np.asarray(y_values, dtype=float)).any() for y_values in y_rows)
+        self._rescale(plot.axes, len(x_values) > 0 and has_data)
+
+        plot.axes.legend(handles=lines, loc='best')
+        plot.axes.set_xlabel(x_label, fontsize=12)
+        plot.axes.set_ylabel(y_label, fontsize=12)
+        plot.axes.set_title(f'{y_label} vs {x_label}', fontsize=14, fontweight='bold')
+        plot.note.set_text(f'Skipped points: {skipped_count}')
+        plot.note.set_visible(skipped_count > 0)
+
+        png = self._to_png(plot.figure)
+        self._record(time.perf_counter() - started)
+        return png
+
+    @timed("render")
+    def render_heatmap(self, x_grid, y_grid, z_grid, x_label: str, y_label: str, z_label: str,
+                       contours: bool = False, skipped_count: int = 0) -> bytes:
+        """Draw z_grid (rows follow y_grid, columns follow x_grid) as a heatmap, optionally with contour lines."""
+        started = time.perf_counter()
+        plot = self._heatmap_plot()
+
+        finite = z_grid[np.isfinite(z_grid)]
+        low, high = (float(finite.min()), float(finite.max())) if finite.size else (0.0, 1.0)
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+
+        plot.image.set_data(z_grid)
+        plot.image.set_extent((x_grid[0], x_grid[-1], y_grid[0], y_grid[-1]))
+        plot.image.set_clim(low, high)
+        plot.colorbar.update_normal(plot.image)
+        plot.colorbar.set_label(z_label, fontsize=12)
+
+        if plot.contours is not None:
+            plot.contours.remove()
+            plot.contours = None
+        if contours and finite.size:
+            plot.contours = plot.axes.contour(x_grid, y_grid, z_grid, levels=10, colors='k', linewidths=0.5)
+
+        plot.axes.set_xlabel(x_label, fontsize=12)
+        plot.axes.set_ylabel(y_label, fontsize=12)
+        plot.axes.set_title(f'{z_label} over {x_label}, {y_label}', fontsize=14, fontweight='bold')
+        plot.note.set_text(f'Skipped points: {skipped_count}')
+        plot.note.set_visible(skipped_count > 0)
+
+        png = self._to_png(plot.figure)
+        self._record(time.perf_counter() - started)
+        return png
+
+    def preload(self) -> None:
+        """Build this thread's figures ahead of the first render."""
+        self._line_plot()
+        self._multi_line_plot()
+        self._heatmap_plot()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "renders": self._renders,
+                "figures_built": self._figures_built,
+                "total_seconds": self._total_seconds,
+                "mean_seconds": self._total_seconds / self._renders if self._renders else 0.0,
+                "max_seconds": self._max_seconds,
+                "last_seconds": self._last_seconds
+            }
+
+    def _line_plot(self) -> _LinePlot:
+        plot = getattr(self._local, "line_plot", None)
+        if plot is None:
+            plot = _LinePlot(self.figsize)
+            self._local.line_plot = plot
+            with self._lock:
+                self._figures_built += 1
+        return plot
+
+    def _multi_line_plot(self) -> _MultiLinePlot:
+        plot = getattr(self._local, "multi_line_plot", None)
+        if plot is None:
+            plot = _MultiLinePlot(self.figsize)
+            self._local.multi_line_plot = plot
+            with self._lock:
+                self._figures_built += 1
+        return plot
+
+    def _heatmap_plot(self) -> _HeatmapPlot:
+        plot = getattr(self._local, "heatmap_plot", None)
+        if plot is None:
+            plot = _HeatmapPlot(self.figsize)
+            self._local.heatmap_plot = plot
+            with self._lock:
+                self._figures_built += 1
+        return plot
+
+    @staticmethod
+    def _split_at(x_values, y_values, breaks):
+        # matplotlib leaves a gap wherever a NaN sits in the line data
+        x_values = np.asarray(x_values, dtype=float)
+        positions = np.searchsorted(x_values, breaks)
+        return (
+            np.insert(x_values, positions, breaks),
+            np.insert(np.asarray(y_values, dtype=float), positions, np.nan)
+        )
+
+    @staticmethod
+    def _rescale(axes, has_data: bool) -> None:
+        if not has_data:
+            # relim() skips empty lines and would keep the previous render's limits
+            axes.set_xlim(-0.055, 0.055)
+            axes.set_ylim(-0.055, 0.055)
+            axes.set_autoscale_on(True)
+            return
+        axes.relim()
+        axes.autoscale_view()
+
+    @timed("savefig")
+    def _to_png(self, figure: mpl_figure.Figure) -> bytes:
+        buffer = BytesIO()
+        figure.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight')
+        return buffer.getvalue()
+
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self._renders += 1
+            self._total_seconds += seconds
+            self._last_seconds = seconds
+            self._max_seconds = max(self._max_seconds, seconds)
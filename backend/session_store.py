@@ -0,0 +1,264 @@
+import copy
+import json
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock, local
+from typing import Optional
+
+from cache import LRUCache
+from solver import FormulaSolver
+
+
+class SessionStore:
+    """
+    Server-side storage for FormulaSolver state, keyed by the session id carried in the cookie.
+    load() hands out a shallow copy so a request that fails half-way never leaks its mutations
+    into the stored state; only save() publishes changes.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl: int = 3600):
+        self.ttl = ttl
+
+    def load(self, session_id: str) -> Optional[FormulaSolver]:
+        raise NotImplementedError
+
+    def save(self, session_id: str, solver: FormulaSolver) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def reset_connections(self) -> None:
+        """Drop connections inherited from a parent process; stores without any have nothing to do."""
+
+    @staticmethod
+    def _snapshot(solver: FormulaSolver) -> FormulaSolver:
+        # Sweep arrays can be huge and are never read back from the session
+        snapshot = copy.copy(solver)
+        snapshot.x_values = []
+        snapshot.y_values = []
+        snapshot.skipped = []
+        return snapshot
+
+
+class MemorySessionStore(SessionStore):
+    """In-process dict of live solvers with a sliding TTL. Sessions are not shared between worker processes."""
+
+    name = "memory"
+
+    def __init__(self, ttl: int = 3600, max_sessions: int = 10000):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def load(self, session_id: str) -> Optional[FormulaSolver]:
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now + self.ttl, entry[1])
+            self._sessions.move_to_end(session_id)
+            return copy.copy(entry[1])
+
+    def save(self, session_id: str, solver: FormulaSolver) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now + self.ttl, self._snapshot(solver))
+            self._sessions.move_to_end(session_id)
+            self._purge(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _purge(self, now: float) -> None:
+        # Entries are kept in last-access order, so expired ones are always at the front
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+
+class SerializedSessionStore(SessionStore):
+    """
+    Base for stores that persist FormulaSolver.to_dict() as JSON outside the process.
+    Every save gets a new revision, stored next to the solver payload; the worker keeps the live solver
+    of recently used sessions and, while the stored revision still matches, reuses it without
+    fetching or parsing the payload at all.
+    """
+
+    def __init__(self, ttl: int = 3600, live_cache_size: int = 1024):
+        super().__init__(ttl)
+        self.live = LRUCache(live_cache_size)
+
+    def load(self, session_id: str) -> Optional[FormulaSolver]:
+        revision = self._read_revision(session_id)
+        if revision is None:
+            return None
+
+        live = self.live.get(session_id)
+        if live is not None and live[0] == revision:
+            return copy.copy(live[1])
+
+        payload = self._read_payload(session_id)
+        if payload is None:
+            return None
+        # A save racing in between can pair this revision with a newer payload; that only costs
+        # one more rehydration on the next load
+        solver = FormulaSolver.from_dict(json.loads(payload))
+        self.live.put(session_id, (revision, solver))
+        return copy.copy(solver)
+
+    def save(self, session_id: str, solver: FormulaSolver) -> None:
+        snapshot = self._snapshot(solver)
+        revision = uuid.uuid4().hex
+        self._write(session_id, revision, json.dumps(snapshot.to_dict()))
+        self.live.put(session_id, (revision, snapshot))
+
+    def _read_revision(self, session_id: str) -> Optional[str]:
+        """The stored revision, or None for unknown and expired sessions. Also slides the expiry."""
+        raise NotImplementedError
+
+    def _read_payload(self, session_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def _write(self, session_id: str, revision: str, payload: str) -> None:
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SerializedSessionStore):
+    """Sessions in a SQLite file, shared by every worker process on the host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: int = 3600, live_cache_size: int = 1024):
+        super().__init__(ttl, live_cache_size)
+        self.path = path
+        self._local = local()
+        with self._connect() as connection:
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(sessions)")]
+            if columns and "revision" not in columns:
+                # Written before revisions had their own column; sessions are short-lived, start over
+                connection.execute("DROP TABLE sessions")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, revision TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self.live.pop(session_id)
+
+    def reset_connections(self) -> None:
+        self._local = local()
+
+    def _read_revision(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT revision FROM sessions WHERE id = ? AND expires_at > ?", (session_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (now + self.ttl, session_id))
+        return row[0]
+
+    def _read_payload(self, session_id: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT payload FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, session_id: str, revision: str, payload: str) -> None:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (id, revision, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (session_id, revision, payload, now + self.ttl)
+            )
+            connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+
+class RedisSessionStore(SerializedSessionStore):
+    """
+    Sessions in Redis (or anything speaking its protocol), the solver payload under `prefix + id`
+    and its revision under `prefix + id + ":revision"`.
+    `client` only needs redis-py style get, set(key, value, ex=seconds), expire and delete(*keys).
+    """
+
+    name = "redis"
+
+    def __init__(self, client, ttl: int = 3600, live_cache_size: int = 1024, prefix: str = "math_solver:session:"):
+        super().__init__(ttl, live_cache_size)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisSessionStore':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("the redis session backend needs the 'redis' package (pip install redis)") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self.prefix + session_id, self._revision_key(session_id))
+        self.live.pop(session_id)
+
+    def _read_revision(self, session_id: str) -> Optional[str]:
+        revision = self.client.get(self._revision_key(session_id))
+        if revision is None:
+            return None
+        # Sliding expiry, same as the other stores
+        self.client.expire(self._revision_key(session_id), self.ttl)
+        self.client.expire(self.prefix + session_id, self.ttl)
+        return _decode(revision)
+
+    def _read_payload(self, session_id: str) -> Optional[str]:
+        payload = self.client.get(self.prefix + session_id)
+        return None if payload is None else _decode(payload)
+
+    def _write(self, session_id: str, revision: str, payload: str) -> None:
+        # Payload first: a reader that sees the new revision always finds its payload
+        self.client.set(self.prefix + session_id, payload, ex=self.ttl)
+        self.client.set(self._revision_key(session_id), revision, ex=self.ttl)
+
+    def _revision_key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}:revision"
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def create_session_store(backend: str, ttl: int = 3600, sqlite_path: str = "sessions.sqlite3",
+                         redis_url: Optional[str] = None) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore(ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteSessionStore(sqlite_path, ttl=ttl)
+    if backend == "redis":
+        return RedisSessionStore.from_url(redis_url or "redis://localhost:6379/0", ttl=ttl)
+    raise ValueError(f"unknown session backend '{backend}', expected memory, sqlite or redis")
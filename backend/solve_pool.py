@@ -0,0 +1,240 @@
+import multiprocessing
+import queue
+import time
+from threading import Lock
+from typing import Optional
+
+
+class SolveTimeoutError(Exception):
+    """sp.solve did not finish before its deadline; the worker running it was killed."""
+
+
+class SolvePoolBusyError(Exception):
+    """Every solve worker stayed busy for longer than the queue timeout."""
+
+
+class SolveWorkerError(Exception):
+    """The worker died mid-solve (e.g. it hit the memory cap) or sp.solve raised."""
+
+
+def _worker_main(connection, memory_limit_bytes: Optional[int]):
+    """
+    Solve loop of one worker process: says ("ready", None) once sympy is imported and warm, then receives
+    (srepr(equation), target) and answers with srepr solutions.
+    """
+    if memory_limit_bytes:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+
+    import sympy as sp
+
+    # The first solve pulls in most of sympy's solvers; don't charge that to a user's deadline
+    sp.solve(sp.Symbol("x") - 1, sp.Symbol("x"))
+    connection.send(("ready", None))
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        equation_srepr, target = request
+        try:
+            solutions = sp.solve(sp.sympify(equation_srepr), sp.Symbol(target))
+            connection.send(("ok", [sp.srepr(s) for s in solutions]))
+        except MemoryError:
+            connection.send(("error", "Solving ran out of memory"))
+        except Exception as e:
+            connection.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_bytes: Optional[int]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, memory_limit_bytes),
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.connection.close()
+
+
+class SolvePool:
+    """
+    Bounded pool of worker processes that run sp.solve with a wall-clock deadline and a memory cap.
+    A solve that overruns its deadline gets its worker killed and replaced, so one pathological
+    formula can't pin a web worker. The deadline only starts once a worker has finished importing
+    sympy. Call start() to spawn the workers ahead of the first solve; replacements are spawned
+    as soon as a worker is killed.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 10.0,
+        memory_limit_mb: Optional[int] = 1024,
+        queue_timeout: float = 1.0,
+        startup_timeout: float = 60.0,
+        context: str = "spawn"
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.queue_timeout = queue_timeout
+        self.startup_timeout = startup_timeout
+        self._context = multiprocessing.get_context(context)
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = Lock()
+        self._workers = 0
+        self._busy = 0
+        self._waiting = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._crashed = 0
+        self._total_seconds = 0.0
+
+    def start(self) -> None:
+        """Spawn workers up to max_workers without waiting for them to import sympy."""
+        while True:
+            with self._lock:
+                if self._workers >= self.max_workers:
+                    return
+                self._workers += 1
+            self._idle.put(self._spawn())
+
+    def solve(self, equation_srepr: str, target: str, timeout: Optional[float] = None) -> list[str]:
+        """
+        Solve srepr(equation) for target in a worker and return the solutions as srepr strings.
+        Raises SolveTimeoutError, SolvePoolBusyError or SolveWorkerError.
+        """
+        worker = self._acquire()
+
+        try:
+            self._wait_until_ready(worker)
+            started = time.monotonic()
+            deadline = started + (self.timeout if timeout is None else timeout)
+            worker.connection.send((equation_srepr, target))
+            while not worker.connection.poll(min(0.05, max(deadline - time.monotonic(), 0))):
+                if time.monotonic() >= deadline:
+                    self._discard(worker)
+                    worker = None
+                    with self._lock:
+                        self._timeouts += 1
+                    raise SolveTimeoutError(f"Solving timed out after {deadline - started:.1f}s")
+            status, payload = worker.connection.recv()
+        except (EOFError, OSError) as e:
+            self._discard(worker)
+            worker = None
+            with self._lock:
+                self._crashed += 1
+            raise SolveWorkerError(f"Solve worker died: {e}") from e
+        finally:
+            if worker is not None:
+                self._release(worker)
+
+        with self._lock:
+            self._completed += 1
+            self._total_seconds += time.monotonic() - started
+
+        if status != "ok":
+            raise SolveWorkerError(payload)
+        return payload
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "workers": self._workers,
+                "busy": self._busy,
+                "waiting": self._waiting,
+                "saturated": self._busy >= self.max_workers,
+                "completed": self._completed,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "crashed": self._crashed,
+                "mean_solve_seconds": self._total_seconds / self._completed if self._completed else 0.0
+            }
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+            with self._lock:
+                self._workers -= 1
+
+    def _acquire(self) -> _Worker:
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            worker = None
+
+        if worker is None:
+            with self._lock:
+                can_start = self._workers < self.max_workers
+                if can_start:
+                    self._workers += 1
+            if can_start:
+                # Only when start() wasn't called or a replacement failed to spawn
+                worker = self._spawn()
+            else:
+                with self._lock:
+                    self._waiting += 1
+                try:
+                    worker = self._idle.get(timeout=self.queue_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._rejected += 1
+                    raise SolvePoolBusyError("All solve workers are busy, try again shortly")
+                finally:
+                    with self._lock:
+                        self._waiting -= 1
+
+        with self._lock:
+            self._busy += 1
+        return worker
+
+    def _release(self, worker: _Worker) -> None:
+        with self._lock:
+            self._busy -= 1
+        self._idle.put(worker)
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._busy -= 1
+            self._workers -= 1
+        # Start the replacement now so it has imported sympy by the time the next solve needs it
+        try:
+            self.start()
+        except Exception:
+            pass
+
+    def _spawn(self) -> _Worker:
+        # The caller has already counted the worker in self._workers
+        try:
+            return _Worker(self._context, self.memory_limit_bytes)
+        except Exception:
+            with self._lock:
+                self._workers -= 1
+            raise
+
+    def _wait_until_ready(self, worker: _Worker) -> None:
+        if worker.ready:
+            return
+        if not worker.connection.poll(self.startup_timeout):
+            raise EOFError(f"no ready message within {self.startup_timeout:.0f}s")
+        worker.connection.recv()
+        worker.ready = True
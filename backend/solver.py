@@ -1,7 +1,18 @@
-import sympy as sp
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
+import numpy as np
+import json
+import os
 import re
-from typing import Optional
+from typing import Callable, NamedTuple, Optional
+from cache import LRUCache, SolveCache
+from codegen import KernelCache
+from instrumentation import stage, timed
+from lazy import LazyModule
+from solve_pool import SolvePoolBusyError, SolveTimeoutError
+
+# sympy takes most of a second to import, so it is loaded on first use (see lazy.py)
+sp = LazyModule("sympy")
 
 RESERVED_FUNCTIONS = {
     "sin", "cos", "arcsin", "arccos", "tan", "arctan",
@@ -11,6 +22,108 @@ RESERVED_FUNCTIONS = {
     "factorial", "E", "I"
 }
 
+# One pass over a formula finds names (with or without a call paren) and the two implied-multiplication
+# shapes: a digit right before a letter/"(" (3a, 3(a)) and a ")" right before a digit/letter/"(" (a)b, (a)(b))
+FORMULA_TOKEN_PATTERN = re.compile(
+    r"(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)(?P<call>\()?"
+    r"|(?P<digit_term>\d(?=[a-zA-Z_(]))"
+    r"|(?P<paren_term>\)(?=[\da-zA-Z_(]))"
+)
+# Inside a name like x2y the digit is still followed by a letter, which counts as implied multiplication
+NAME_DIGIT_TERM_PATTERN = re.compile(r"\d[a-zA-Z_]")
+
+# Tokenized formulas keyed by the (stripped) formula string
+TOKEN_CACHE = LRUCache(maxsize=int(os.environ.get("MATH_SOLVER_TOKEN_CACHE_SIZE", 1024)))
+
+
+class FormulaTokens(NamedTuple):
+    variables: tuple   # sorted, reserved names removed
+    calls: tuple       # names followed by "(", in order of appearance
+    implied: bool      # contains implied multiplication like 3a, 3(a+b) or (a)b
+
+
+def tokenize_formula(formula_string: str) -> FormulaTokens:
+    """Tokenize a formula in a single pass, memoized in TOKEN_CACHE."""
+    tokens = TOKEN_CACHE.get(formula_string)
+    if tokens is not None:
+        return tokens
+
+    names = set()
+    calls = []
+    implied = False
+    for match in FORMULA_TOKEN_PATTERN.finditer(formula_string):
+        name = match.group("name")
+        if name is None:
+            implied = True
+            continue
+        names.add(name)
+        if match.group("call"):
+            implied = implied or name[-1].isdigit()
+            # Only a call when the name starts at a word boundary (Unicode \b, as the old check used),
+            # so the "a" of a name like "éa" isn't taken for a function of its own
+            start = match.start()
+            if start == 0 or not (formula_string[start - 1].isalnum() or formula_string[start - 1] == "_"):
+                calls.append(name)
+        implied = implied or NAME_DIGIT_TERM_PATTERN.search(name) is not None
+
+    tokens = FormulaTokens(tuple(sorted(names - RESERVED_FUNCTIONS)), tuple(calls), implied)
+    TOKEN_CACHE.put(formula_string, tokens)
+    return tokens
+
+
+# Compiled sweep functions shared by every solver in the process, keyed by expression + argument order
+COMPILED_CACHE = LRUCache(maxsize=int(os.environ.get("MATH_SOLVER_COMPILED_CACHE_SIZE", 256)))
+
+# Generated CSE kernels behind COMPILED_CACHE; set MATH_SOLVER_KERNEL_DIR to keep them on disk across processes
+KERNEL_CACHE = KernelCache(os.environ.get("MATH_SOLVER_KERNEL_DIR"))
+
+# Adaptive sweeps start from this many points and never bisect below this fraction of the range
+ADAPTIVE_INITIAL_POINTS = 33
+ADAPTIVE_MIN_WIDTH_RATIO = 1e-9
+# A sign flip between values this many times the median magnitude is treated as a pole
+POLE_MAGNITUDE_RATIO = 10
+
+# Sweeps that are built whole (not streamed) are capped at SWEEP_MAX_POINTS, counting every fixed set
+SWEEP_MAX_POINTS = int(os.environ.get("MATH_SOLVER_SWEEP_MAX_POINTS", 4_000_000))
+# Grid sweeps are capped at GRID_MAX_POINTS and evaluated GRID_CHUNK_POINTS at a time
+GRID_MAX_POINTS = int(os.environ.get("MATH_SOLVER_GRID_MAX_POINTS", 4_000_000))
+GRID_CHUNK_POINTS = int(os.environ.get("MATH_SOLVER_GRID_CHUNK_POINTS", 262_144))
+# Expressions whose compiled function fails on real values fall back to evalf, which only scales this far
+GRID_EVALF_MAX_POINTS = int(os.environ.get("MATH_SOLVER_GRID_EVALF_MAX_POINTS", 40_000))
+
+# Streaming sweeps evaluate and emit this many points at a time
+STREAM_CHUNK_POINTS = int(os.environ.get("MATH_SOLVER_STREAM_CHUNK_POINTS", 4096))
+
+# Numeric root finding: bracket-scan seeds for the target, then safeguarded Newton until the step is this small
+NUMERIC_SEEDS = np.concatenate([-np.logspace(6, -6, 25), [0.0], np.logspace(-6, 6, 25)])
+NUMERIC_MAX_ITERATIONS = 100
+# Numeric sweeps continue roots along the sweep this many points at a time to start with
+NUMERIC_CONTINUATION_BLOCK = 64
+NUMERIC_TOLERANCE = 1e-12
+
+# sp.solve results keyed by (srepr(equation), target); set MATH_SOLVER_SOLVE_CACHE_DIR to persist them on disk
+SOLVE_CACHE = SolveCache(
+    maxsize=int(os.environ.get("MATH_SOLVER_SOLVE_CACHE_SIZE", 512)),
+    directory=os.environ.get("MATH_SOLVER_SOLVE_CACHE_DIR"),
+    dumps=lambda solutions: json.dumps([sp.srepr(s) for s in solutions]),
+    loads=lambda text: [sp.sympify(s) for s in json.loads(text)]
+)
+
+# Optional SolvePool that runs sp.solve in worker processes with a deadline; None solves in-process
+SOLVE_POOL = None
+
+
+def configure_solve_pool(pool) -> None:
+    global SOLVE_POOL
+    if SOLVE_POOL is not None and SOLVE_POOL is not pool:
+        SOLVE_POOL.shutdown()
+    SOLVE_POOL = pool
+
+
+def _returning_tuple(function):
+    return lambda *arguments: (function(*arguments),)
+
+
 class FormulaSolver:
     def __init__(self):
         self.formula_string: Optional[str] = None
@@ -35,10 +148,13 @@ class FormulaSolver:
         self.index: Optional[int] = 0
         self.solutions_list_strings = []
         self.solved_expression_string = None
+        # True when the target has no closed form and is root-found numerically per sweep point
+        self.is_numeric: bool = False
 
 
     # ========== PUBLIC METHODS ==========
 
+    @timed("parse")
     def set_formula(self, formula_string: str) -> dict:
         self.error_message: str = ""
 
@@ -83,7 +199,11 @@ class FormulaSolver:
             "formula_string": formula_string
         }
 
-    def solve_for_target(self, target: str) -> dict:
+    def solve_for_target(self, target: str, numeric_fallback: bool = False) -> dict:
+        """
+        Solve the equation for target. With numeric_fallback, a solve that finds nothing, fails or times out
+        switches to numeric mode (status "numeric") instead of failing: sweeps then root-find the target per point.
+        """
         if self.equation is None:
             return {
                 "status": "error",
@@ -112,12 +232,12 @@ class FormulaSolver:
                 "index": None
             }
 
-        symbol = self.symbols_dict[target]
-
         try:
-            solutions = sp.solve(self.equation, symbol)
+            solutions = self._solve_equation(target)
 
             # No solutions
+            if len(solutions) == 0 and numeric_fallback:
+                return self._numeric_solution(target, f"No closed-form solutions found for {target}")
             if len(solutions) == 0:
                 return {
                     "status": "none",
@@ -135,6 +255,7 @@ class FormulaSolver:
             # One solution
             elif len(solutions) == 1:
                 self.target_variable = target
+                self.is_numeric = False
                 self.index = 0
                 solved_expression = solutions[self.index]
                 self._set_solutions_list(solutions)
@@ -184,6 +305,7 @@ class FormulaSolver:
             # Multiple solutions
             else:
                 self.target_variable = target
+                self.is_numeric = False
                 self._set_solutions_list(solutions)
                 return {
                     "status": "multiple",
@@ -204,7 +326,31 @@ class FormulaSolver:
                     "fixed": self.fixed       
                 }
 
+        except (SolveTimeoutError, SolvePoolBusyError) as e:
+            if numeric_fallback and isinstance(e, SolveTimeoutError):
+                return self._numeric_solution(target, str(e))
+            return {
+                "status": "timeout" if isinstance(e, SolveTimeoutError) else "busy",
+                "status_bool": False,
+                "solutions": [],
+                "needs_choice": False,
+                "error": str(e),
+                "target": target,
+                "available": self.variables_list,
+                "required_list_str": [],
+                "formula_string": self.formula_string,
+                "is_const": False,           
+                "is_one_var": False,         
+                "is_multi_var": False,       
+                "equation_type": "", 
+                "index": self.index , 
+                "sweeper": self.sweeper, 
+                "fixed": self.fixed
+            }
+
         except Exception as e:
+            if numeric_fallback:
+                return self._numeric_solution(target, f"Solving error: {str(e)}")
             return {
                 "status": "error",
                 "status_bool": False,
@@ -249,6 +395,9 @@ class FormulaSolver:
                     self.is_one_var = False
                     self.is_multi_var = False
                     self.equation_type = "constant"
+                    # Same as a single constant solution from solve_for_target: nothing left to pick
+                    self.sweeper = "const"
+                    self.fixed = {}
                 elif num_vars == 1:
                     self.is_const = False
                     self.is_one_var = True
@@ -259,6 +408,9 @@ class FormulaSolver:
                     self.is_one_var = False
                     self.is_multi_var = True
                     self.equation_type = "multi_variable"
+                if not self.is_const and self.sweeper == "const":
+                    # Left over from choosing a constant solution before
+                    self.sweeper = None
 
                 return {
                     "status": "success",
@@ -446,33 +598,13 @@ class FormulaSolver:
        
 
     def perform_sweep(self, start: float, end: float, steps: int) -> dict:
-        errorlist = []
         skipped = []
-        fixed = self.fixed
-
-        if self.solved_expression is None:
-            error1 = "No solution set."
-            errorlist.append(error1)
-
-        if steps < 2:
-            error2 = "Steps must be at least 2"
-            errorlist.append(error2)
-
-        if self.sweeper is None:
-            error3 = "no chosen sweeper"
-            errorlist.append(error3)
         sweeper = self.sweeper
-        if len(errorlist) > 0:
-            return {
-                "status": "error",
-                "x_values": [],
-                "y_values": [],
-                "skipped": skipped,
-                "error": "; ".join(errorlist),
-                "is_const": self.is_const
-            }
 
-        expression_to_sweeper = self.solved_expression.subs(fixed)
+        error_response = self._sweep_error_response(steps)
+        if error_response is not None:
+            return error_response
+
         step = (end - start) / (steps - 1)
         x_values = []
         y_values = []
@@ -502,15 +634,11 @@ class FormulaSolver:
             }
 
         elif sweeper is not None:
-            for i in range(steps):
-                x_value = start + (i * step)
-                try:
-                    y_value = float((expression_to_sweeper.subs(self.symbols_dict[self.sweeper], x_value)).evalf(n=15))
-                    x_values.append(x_value)
-                    y_values.append(y_value)
-                except (TypeError, ValueError, ZeroDivisionError, Exception) as e:
-                    skipped.append(x_value)
-                    continue
+            x_grid = start + np.arange(steps) * step
+            y_grid, valid = self._evaluate_sweep_points(x_grid)
+            x_values = x_grid[valid].tolist()
+            y_values = y_grid[valid].tolist()
+            skipped = x_grid[~valid].tolist()
 
             self.x_values = x_values
             self.y_values = y_values
@@ -524,6 +652,344 @@ class FormulaSolver:
                 "error": "",
                 "is_const": self.is_const
             }
+
+    def iter_sweep(self, start: float, end: float, steps: int, chunk_size: Optional[int] = None):
+        """
+        Generator version of perform_sweep: yields one response-shaped dict per chunk of at most
+        `chunk_size` (default STREAM_CHUNK_POINTS) consecutive grid points, so only one chunk is ever held in memory.
+        Nothing is stored on the solver. A validation failure is yielded as a single "error" dict.
+        """
+        error_response = self._sweep_error_response(steps)
+        if error_response is not None:
+            yield error_response
+            return
+
+        step = (end - start) / (steps - 1)
+        chunk_size = max(1, int(chunk_size or STREAM_CHUNK_POINTS))
+
+        for first in range(0, steps, chunk_size):
+            x_grid = start + np.arange(first, min(first + chunk_size, steps)) * step
+            if self.is_const:
+                const = float(self.solved_expression.evalf(n=15))
+                y_grid, valid = np.full(x_grid.shape, const), np.ones(x_grid.shape, dtype=bool)
+            else:
+                y_grid, valid = self._evaluate_sweep_points(x_grid)
+
+            yield {
+                "status": "success",
+                "x_values": x_grid[valid].tolist(),
+                "y_values": y_grid[valid].tolist(),
+                "skipped": x_grid[~valid].tolist(),
+                "error": "",
+                "is_const": self.is_const
+            }
+
+    def perform_branch_sweep(self, start: float, end: float, steps: int) -> dict:
+        """
+        Sweep every expression in solutions_list over the same uniform grid in one pass, using the current
+        sweeper and fixed values. All branches are evaluated by one compiled function, so subterms they
+        share (like a discriminant) are computed once per point.
+        "branches" holds, per solution index, y_values aligned with x_values (None where skipped) and a
+        boolean "skipped" mask. A branch that needs variables other than the sweeper and fixed ones is
+        skipped entirely, with the reason in its "error"; constant branches come out as flat lines.
+        Nothing is stored on the solver.
+        """
+        error_response = self._sweep_error_response(steps)
+        if error_response is None and not self.solutions_list:
+            error_response = {
+                "status": "error",
+                "x_values": [],
+                "y_values": [],
+                "skipped": [],
+                "error": "No solution branches to sweep; numeric solutions have a single branch",
+                "is_const": self.is_const
+            }
+        if error_response is not None:
+            error_response["branches"] = []
+            return error_response
+
+        step = (end - start) / (steps - 1)
+        x_grid = start + np.arange(steps) * step
+        branches = []
+        for index, ((y_grid, valid), error) in enumerate(self._evaluate_branch_points(x_grid)):
+            y_values = y_grid.tolist()
+            for skipped_index in np.flatnonzero(~valid).tolist():
+                y_values[skipped_index] = None
+            branches.append({
+                "index": index,
+                "solution": self.solutions_list_strings[index],
+                "y_values": y_values,
+                "skipped": (~valid).tolist(),
+                "error": error
+            })
+
+        return {
+            "status": "success",
+            "x_values": x_grid.tolist(),
+            "branches": branches,
+            "error": "",
+            "is_const": self.is_const
+        }
+
+    def perform_adaptive_sweep(self, start: float, end: float, max_evaluations: int, tolerance: float = 1e-3,
+                               progress: Optional[Callable[[float], None]] = None) -> dict:
+        """
+        Sweep with adaptive sampling: start from a coarse grid and keep bisecting only the intervals
+        whose midpoint deviates from the chord of its neighbours by more than `tolerance`
+        (relative to the curve's y range), until nothing exceeds it or `max_evaluations` is spent.
+        Sign flips between huge values are reported in "poles" so the curve isn't drawn across them.
+        `progress`, if given, is called with the share of the evaluation budget spent before every refinement pass;
+        it may raise to abandon the sweep.
+        """
+        error_response = self._sweep_error_response(max_evaluations)
+        if error_response is not None:
+            error_response.update({"poles": [], "evaluations": 0})
+            return error_response
+
+        if self.is_const:
+            # A constant is a straight line, two points draw it exactly
+            response = self.perform_sweep(start, end, 2)
+            response.update({"poles": [], "evaluations": 1})
+            return response
+
+        x_grid = np.linspace(start, end, min(max_evaluations, ADAPTIVE_INITIAL_POINTS))
+        y_grid, valid = self._evaluate_sweep_points(x_grid)
+        y_grid = np.where(valid, y_grid, np.nan)
+        evaluations = x_grid.size
+        min_width = (end - start) * ADAPTIVE_MIN_WIDTH_RATIO
+
+        while evaluations < max_evaluations:
+            if progress is not None:
+                progress(evaluations / max_evaluations)
+            errors = self._interval_errors(x_grid, y_grid)
+            errors[np.diff(x_grid) <= min_width] = 0
+            refine = np.flatnonzero(errors > tolerance)
+            if refine.size == 0:
+                break
+
+            budget = max_evaluations - evaluations
+            if refine.size > budget:
+                refine = np.sort(refine[np.argsort(errors[refine])[::-1][:budget]])
+
+            midpoints = (x_grid[refine] + x_grid[refine + 1]) / 2
+            new_y, new_valid = self._evaluate_sweep_points(midpoints)
+            x_grid = np.insert(x_grid, refine + 1, midpoints)
+            y_grid = np.insert(y_grid, refine + 1, np.where(new_valid, new_y, np.nan))
+            evaluations += midpoints.size
+
+        valid = np.isfinite(y_grid)
+        x_values = x_grid[valid].tolist()
+        y_values = y_grid[valid].tolist()
+        skipped = x_grid[~valid].tolist()
+
+        self.x_values = x_values
+        self.y_values = y_values
+        self.skipped = skipped
+
+        return {
+            "status": "success",
+            "x_values": x_values,
+            "y_values": y_values,
+            "skipped": skipped,
+            "poles": self._find_poles(x_grid[valid], y_grid[valid]),
+            "evaluations": int(evaluations),
+            "error": "",
+            "is_const": self.is_const
+        }
+
+    def perform_family_sweep(self, start: float, end: float, steps: int, fixed_sets: list[dict],
+                             progress: Optional[Callable[[float], None]] = None) -> dict:
+        """
+        Sweep the chosen sweeper once per set of fixed values, all against the same x grid.
+        The compiled function is called with the fixed values broadcast as columns, up to
+        GRID_CHUNK_POINTS points at a time, so K families cost a few batched evaluations instead of K sweeps.
+        "y_grid" has one row per fixed set with NaN for skipped points; nothing is stored on the solver.
+        `progress`, if given, is called with the share of fixed sets done before each batch (or set);
+        it may raise to abandon the sweep.
+        """
+        error_response = self._sweep_error_response(steps)
+        errorlist = [error_response["error"]] if error_response is not None else []
+
+        if not self.is_multi_var:
+            errorlist.append("parameter families need a multi-variable solution")
+
+        if not fixed_sets:
+            errorlist.append("fixed_sets must contain at least one set of fixed values")
+
+        required = self.required_list_final or []
+        for i, fixed in enumerate(fixed_sets):
+            if not isinstance(fixed, dict):
+                errorlist.append(f"fixed_sets[{i}] must be dict, we got {type(fixed).__name__}")
+                continue
+            missing_keys = [key for key in required if key not in fixed]
+            extra_keys = [key for key in fixed if key not in required]
+            if missing_keys:
+                errorlist.append(f"fixed_sets[{i}]: Missing required variables: {', '.join(missing_keys)}")
+            if extra_keys:
+                errorlist.append(f"fixed_sets[{i}]: Invalid variables: {', '.join(extra_keys)}")
+            for name in required:
+                value = fixed.get(name)
+                # bool is an int subclass, but True isn't a value anyone means to sweep with
+                if name in fixed and (isinstance(value, bool) or not isinstance(value, (float, int))):
+                    errorlist.append(f"fixed_sets[{i}].{name} must be float or int, we got {type(value).__name__}")
+
+        if errorlist:
+            return {
+                "status": "error",
+                "x_grid": None,
+                "y_grid": None,
+                "skipped_counts": [],
+                "error": "; ".join(errorlist)
+            }
+
+        step = (end - start) / (steps - 1)
+        x_grid = start + np.arange(steps) * step
+        shape = (len(fixed_sets), steps)
+        fixed_names = sorted(required)
+        sweep_function = None if self.is_numeric else self._get_compiled_sweep_function(fixed_names)
+
+        y_grid = np.empty(shape)
+        done = 0
+        if sweep_function is not None:
+            columns = [np.array([fixed[name] for fixed in fixed_sets], dtype=float)[:, None] for name in fixed_names]
+            rows_per_chunk = max(1, GRID_CHUNK_POINTS // steps)
+            for row in range(0, len(fixed_sets), rows_per_chunk):
+                if progress is not None:
+                    progress(row / len(fixed_sets))
+                rows = min(rows_per_chunk, len(fixed_sets) - row)
+                chunk_columns = [column[row:row + rows] for column in columns]
+                evaluated = self._evaluate_compiled(sweep_function, [x_grid[None, :], *chunk_columns], (rows, steps))
+                if evaluated is None:
+                    break
+                y_chunk, valid = evaluated
+                y_grid[row:row + rows] = np.where(valid, y_chunk, np.nan)
+                done = row + rows
+
+        # Whatever the compiled function couldn't do, one set at a time
+        for i in range(done, len(fixed_sets)):
+            if progress is not None:
+                progress(i / len(fixed_sets))
+            if self.is_numeric:
+                row, valid = self._solve_numeric_points(x_grid, self.sweeper, fixed_sets[i])
+            else:
+                row, valid = self._evaluate_evalf(x_grid, fixed_sets[i])
+            y_grid[i] = np.where(valid, row, np.nan)
+
+        return {
+            "status": "success",
+            "x_grid": x_grid,
+            "y_grid": y_grid,
+            "skipped_counts": np.isnan(y_grid).sum(axis=1).tolist(),
+            "error": ""
+        }
+
+    def perform_grid_sweep(
+        self,
+        x_sweeper: str,
+        y_sweeper: str,
+        x_range: tuple,
+        y_range: tuple,
+        fixed: dict
+    ) -> dict:
+        """
+        Evaluate solved_expression over a 2-D mesh of two sweepers, with every other variable in `fixed`.
+        Ranges are (start, end, steps). Rows are evaluated in chunks of at most GRID_CHUNK_POINTS points,
+        so intermediates stay small however large the mesh is. Invalid points are NaN in "z_grid".
+        Grids are returned as NumPy arrays and are not stored on the solver.
+        """
+        errorlist = []
+        required_list_str = self._get_required_variables()
+
+        if self.solved_expression is None and not self.is_numeric:
+            errorlist.append("No solution set.")
+
+        for sweeper in (x_sweeper, y_sweeper):
+            if sweeper not in required_list_str:
+                errorlist.append(f"sweeper '{sweeper}' not in {required_list_str}")
+
+        if x_sweeper == y_sweeper:
+            errorlist.append("the two sweepers must be different variables")
+
+        missing_keys = [key for key in required_list_str if key not in (x_sweeper, y_sweeper) and key not in fixed]
+        extra_keys = [key for key in fixed if key not in required_list_str or key in (x_sweeper, y_sweeper)]
+        if missing_keys:
+            errorlist.append(f"Missing required variables: {', '.join(missing_keys)}")
+        if extra_keys:
+            errorlist.append(f"Invalid variables: {', '.join(extra_keys)}")
+        for name, value in fixed.items():
+            # Same rule as fixed_sets in perform_family_sweep
+            if isinstance(value, bool) or not isinstance(value, (float, int)):
+                errorlist.append(f"fixed.{name} must be float or int, we got {type(value).__name__}")
+
+        for name, (start, end, steps) in (("x", x_range), ("y", y_range)):
+            if steps < 2:
+                errorlist.append(f"{name} steps must be at least 2")
+            if start >= end:
+                errorlist.append(f"{name} start must be less than end")
+
+        if x_range[2] * y_range[2] > GRID_MAX_POINTS:
+            errorlist.append(f"grid has {x_range[2] * y_range[2]} points, the limit is {GRID_MAX_POINTS}")
+
+        compiled_function = None
+        if not errorlist and not self.is_numeric:
+            fixed_names = sorted(fixed)
+            compiled_function = self._get_compiled_function([x_sweeper, y_sweeper, *fixed_names])
+            if compiled_function is None:
+                errorlist.append("this expression can't be vectorized for a grid sweep")
+
+        if errorlist:
+            return self._grid_error_response(errorlist)
+
+        x_grid = np.linspace(x_range[0], x_range[1], x_range[2])
+        y_grid = np.linspace(y_range[0], y_range[1], y_range[2])
+        z_grid = np.empty((y_grid.size, x_grid.size))
+
+        if self.is_numeric:
+            # No closed form to vectorize over the mesh, so root-find one row at a time
+            for row, y_value in enumerate(y_grid.tolist()):
+                z_row, valid = self._solve_numeric_points(x_grid, x_sweeper, {**fixed, y_sweeper: y_value})
+                z_grid[row] = np.where(valid, z_row, np.nan)
+            return {
+                "status": "success",
+                "x_grid": x_grid,
+                "y_grid": y_grid,
+                "z_grid": z_grid,
+                "skipped_count": int(np.isnan(z_grid).sum()),
+                "error": ""
+            }
+
+        fixed_values = [fixed[name] for name in fixed_names]
+        rows_per_chunk = max(1, GRID_CHUNK_POINTS // x_grid.size)
+        use_evalf = False
+
+        for row in range(0, y_grid.size, rows_per_chunk):
+            y_chunk = y_grid[row:row + rows_per_chunk, None]
+            shape = (y_chunk.shape[0], x_grid.size)
+            evaluated = None
+            if not use_evalf:
+                evaluated = self._evaluate_compiled(compiled_function, [x_grid[None, :], y_chunk, *fixed_values], shape)
+            if evaluated is None:
+                # The compiled function failed on real values (e.g. factorial of floats): go point by point like
+                # perform_sweep does, as long as the mesh is small enough for that to finish
+                if z_grid.size > GRID_EVALF_MAX_POINTS:
+                    return self._grid_error_response([
+                        f"this expression can't be vectorized; point-by-point grid sweeps are limited to {GRID_EVALF_MAX_POINTS} points"
+                    ])
+                use_evalf = True
+                evaluated = self._evaluate_evalf_rows(x_grid, x_sweeper, y_chunk[:, 0], y_sweeper, fixed)
+            z_chunk, valid = evaluated
+            z_grid[row:row + shape[0]] = np.where(valid, z_chunk, np.nan)
+
+        return {
+            "status": "success",
+            "x_grid": x_grid,
+            "y_grid": y_grid,
+            "z_grid": z_grid,
+            "skipped_count": int(np.isnan(z_grid).sum()),
+            "error": ""
+        }
+
+    @timed("to_dict")
     def to_dict(self) -> dict:
         """
         Converts the solver state to a JSON-serializable dictionary
@@ -551,6 +1017,7 @@ class FormulaSolver:
             "is_const": self.is_const,
             "is_one_var": self.is_one_var,
             "is_multi_var": self.is_multi_var,
+            "is_numeric": self.is_numeric,
             
             # Dictionary (already JSON-safe)
             "fixed": self.fixed,
@@ -562,6 +1029,7 @@ class FormulaSolver:
         }
     
     @classmethod
+    @timed("from_dict")
     def from_dict(cls, data: dict) -> 'FormulaSolver':
         """
         Creates a new FormulaSolver instance from a saved dictionary
@@ -586,6 +1054,7 @@ class FormulaSolver:
         solver.is_const = data.get("is_const", False)
         solver.is_one_var = data.get("is_one_var", False)
         solver.is_multi_var = data.get("is_multi_var", False)
+        solver.is_numeric = data.get("is_numeric", False)
         
         # Restore dictionary
         solver.fixed = data.get("fixed", {})
@@ -595,24 +1064,78 @@ class FormulaSolver:
         solver.y_values = data.get("y_values", [])
         solver.skipped = data.get("skipped", [])
         
-        # RE-CREATE sympy objects from formula
+        # Sympy objects are rebuilt lazily on first access (see the properties below),
+        # so steps that never touch the equation don't pay for parsing it
         if solver.formula_string:
-            # Re-parse the formula
-            solver.variables_list = solver._parse_variables(solver.formula_string)
-            solver.symbols_dict = solver._symbolize_variables(solver.variables_list)
-            solver.equation = solver._build_equation()
-        
-        # Convert string versions back to sympy using your helper methods!
+            if not solver.variables_list:
+                solver.variables_list = solver._parse_variables(solver.formula_string)
+            solver._symbols_pending = True
+            solver._equation_pending = True
+
         if data.get("solutions_list_strings"):
-            solutions = [sp.sympify(s) for s in data["solutions_list_strings"]]
-            solver._set_solutions_list(solutions) 
-        
+            solver.solutions_list_strings = data["solutions_list_strings"]
+            solver._solutions_list_pending = True
+
         if data.get("solved_expression_string"):
-            solved_expr = sp.sympify(data["solved_expression_string"])
-            solver._set_solved_expression(solved_expr)
+            solver.solved_expression_string = data["solved_expression_string"]
+            solver._solved_expression_pending = True
         
         return solver
 
+    # ========== LAZY SYMPY STATE ==========
+
+    @property
+    def symbols_dict(self) -> dict:
+        if self._symbols_pending:
+            self._symbols_dict = self._symbolize_variables(self.variables_list)
+            self._symbols_pending = False
+        return self._symbols_dict
+
+    @symbols_dict.setter
+    def symbols_dict(self, value: dict):
+        self._symbols_pending = False
+        self._symbols_dict = value
+
+    @property
+    def equation(self) -> Optional[sp.Eq]:
+        if self._equation_pending:
+            self._equation = self._build_equation()
+            self._equation_pending = False
+        return self._equation
+
+    @equation.setter
+    def equation(self, value: Optional[sp.Eq]):
+        self._equation_pending = False
+        self._equation = value
+
+    @property
+    def solutions_list(self) -> list:
+        if self._solutions_list_pending:
+            self._solutions_list = [self._sympify_solution(s) for s in self.solutions_list_strings]
+            self._solutions_list_pending = False
+        return self._solutions_list
+
+    @solutions_list.setter
+    def solutions_list(self, value: list):
+        self._solutions_list_pending = False
+        self._solutions_list = value
+
+    @property
+    def solved_expression(self) -> Optional[sp.Expr]:
+        if self._solved_expression_pending:
+            self._solved_expression = self._sympify_solution(self.solved_expression_string)
+            self._solved_expression_pending = False
+        return self._solved_expression
+
+    @solved_expression.setter
+    def solved_expression(self, value: Optional[sp.Expr]):
+        self._solved_expression_pending = False
+        self._solved_expression = value
+
+    def _sympify_solution(self, expression_string: str):
+        # With the formula's own symbols, so variables named like sympy objects (S, beta, ...) stay symbols
+        return sp.sympify(expression_string, locals=self.symbols_dict)
+
     # ========== PRIVATE METHODS ==========
 
     def _validate_syntax(self, formula_string: str) -> bool:
@@ -621,8 +1144,7 @@ class FormulaSolver:
             self.error_message = "formula_string is required"
             return False
 
-        equals_matches = re.findall(r"=", trimmed_formula)
-        if len(equals_matches) != 1:
+        if trimmed_formula.count("=") != 1:
             self.error_message = "the string must contain exactly one '='"
             return False
 
@@ -631,37 +1153,26 @@ class FormulaSolver:
             self.error_message = "both sides of '=' must be non-empty"
             return False
 
-        pattern_digit_followed_by_term = r"(\d)([a-zA-Z_]|\()"
-        pattern_paren_followed_by_term = r"([)])(\d|[a-zA-Z_]|\()"
-        working_formula = trimmed_formula
+        tokens = tokenize_formula(trimmed_formula)
 
-        if (
-            re.search(pattern_digit_followed_by_term, working_formula) or
-            re.search(pattern_paren_followed_by_term, working_formula)
-        ):
+        if tokens.implied:
             self.error_message = "the string contains implied multiplication like 3a, 3(a+b): please use explicit (e.g. 3*a)"
             return False
 
-        pattern_word_paren = r"\b([a-zA-Z_][a-zA-Z0-9_]*)\("
-        func_matches = re.findall(pattern_word_paren, working_formula)
-
-        for match in func_matches:
+        for match in tokens.calls:
             if match not in RESERVED_FUNCTIONS:
                 self.error_message = f"the string contains implied multiplication like {match}(something): please use explicit (e.g. {match}*(something))"
                 return False
 
-        if len(self._parse_variables(working_formula)) < 1:
+        if len(tokens.variables) < 1:
             self.error_message = "the formula must have at least 1 variable"
             return False
 
         return True
 
     def _parse_variables(self, formula_string: str) -> list[str]:
-        pattern = r"[a-zA-Z_][a-zA-Z0-9_]*"
-        unfiltered_words = re.findall(pattern, formula_string)
-        unique_words = set(unfiltered_words)
-        variables_list = sorted(list(unique_words - RESERVED_FUNCTIONS))
-        return variables_list
+        # Stripped so it shares the TOKEN_CACHE entry _validate_syntax just made
+        return list(tokenize_formula(formula_string.strip()).variables)
 
 
 
@@ -686,17 +1197,513 @@ class FormulaSolver:
             return None
 
     def _get_required_variables(self) -> list:
+        if self.is_numeric:
+            # Numeric mode keeps the whole equation, so everything but the target stays an input
+            return sorted(s.name for s in self.equation.free_symbols if s.name != self.target_variable)
         if self.solved_expression is None:
             return []
         required_list = self.solved_expression.free_symbols
         required_list_str = [s.name for s in required_list]
         return sorted(required_list_str)
     
+    def _solve_equation(self, target: str) -> list:
+        """
+        sp.solve for target, memoized in SOLVE_CACHE by the canonical (srepr) form of the equation.
+        Runs in SOLVE_POOL when one is configured, which may raise SolveTimeoutError or SolvePoolBusyError.
+        """
+        key = (sp.srepr(self.equation), target)
+        solutions = SOLVE_CACHE.get(key)
+        if solutions is None:
+            with stage("sympy_solve"):
+                if SOLVE_POOL is not None:
+                    solutions = [sp.sympify(s) for s in SOLVE_POOL.solve(key[0], target)]
+                else:
+                    solutions = sp.solve(self.equation, self.symbols_dict[target])
+            SOLVE_CACHE.put(key, solutions, formula_string=self.formula_string, target=target)
+        return list(solutions)
+
+    def _get_compiled_sweep_function(self, fixed_names: list[str]):
+        """Return a NumPy function f(sweeper, *fixed_values) for solved_expression, or None if it can't be compiled."""
+        return self._get_compiled_function([self.sweeper, *fixed_names])
+
+    def _get_compiled_function(self, argument_names: list[str], expression=None):
+        """
+        Return a NumPy function of the named symbols for `expression` (default solved_expression),
+        or None if it can't be compiled. A tuple of expressions gives a function returning a tuple.
+        Functions are generated with common subexpressions hoisted (see codegen.py), falling back to lambdify
+        for what the generator can't print, and shared through COMPILED_CACHE so repeat sweeps skip both.
+        """
+        if expression is None:
+            expression = self.solved_expression
+        # Expressions hash and compare structurally (assumptions included), and unlike srepr
+        # their hash is cached, so large solutions don't pay for printing on every sweep
+        key = (expression, tuple(argument_names))
+        compiled_function = COMPILED_CACHE.get(key)
+        if compiled_function is not None:
+            # False marks an expression lambdify already rejected
+            return compiled_function or None
+
+        arguments = [self.symbols_dict.get(name, sp.Symbol(name)) for name in argument_names]
+        try:
+            with stage("compile"):
+                expressions = list(expression) if isinstance(expression, tuple) else [expression]
+                compiled_function = KERNEL_CACHE.load(arguments, expressions)
+                if compiled_function is not None and len(expressions) == 1 and isinstance(expression, tuple):
+                    compiled_function = _returning_tuple(compiled_function)
+                if compiled_function is None:
+                    compiled_function = sp.lambdify(arguments, expression, modules="numpy")
+        except Exception:
+            COMPILED_CACHE.put(key, False)
+            return None
+
+        COMPILED_CACHE.put(key, compiled_function)
+        return compiled_function
+
+    def _evaluate_sweep_points(self, x_grid):
+        """
+        Evaluate solved_expression (with fixed values) at every sweeper value in x_grid.
+        Returns (y_grid, valid); non-finite and complex points are marked invalid.
+        """
+        if self.is_numeric:
+            return self._solve_numeric_points(x_grid, self.sweeper, self.fixed)
+
+        fixed_names = sorted(self.fixed)
+        sweep_function = self._get_compiled_sweep_function(fixed_names)
+        if sweep_function is not None:
+            fixed_values = [self.fixed[name] for name in fixed_names]
+            evaluated = self._evaluate_compiled(sweep_function, [x_grid, *fixed_values], x_grid.shape)
+            if evaluated is not None:
+                return evaluated
+        return self._evaluate_evalf(x_grid)
+
+    def _evaluate_branch_points(self, x_grid) -> list:
+        """((y_grid, valid), error) for every expression in solutions_list at the sweeper values in x_grid."""
+        fixed_names = sorted(self.fixed)
+        available = {self.sweeper, *fixed_names}
+        results = []
+        evaluable = []
+        for index, expression in enumerate(self.solutions_list):
+            missing = sorted({symbol.name for symbol in expression.free_symbols} - available)
+            error = f"This solution also depends on {', '.join(missing)}" if missing else ""
+            results.append(((np.full(x_grid.shape, np.nan), np.zeros(x_grid.shape, dtype=bool)), error))
+            if not missing:
+                evaluable.append(index)
+        if not evaluable:
+            return results
+
+        expressions = tuple(self.solutions_list[index] for index in evaluable)
+        evaluated = None
+        branches_function = self._get_compiled_function([self.sweeper, *fixed_names], expressions)
+        if branches_function is not None:
+            fixed_values = [self.fixed[name] for name in fixed_names]
+            evaluated = self._evaluate_compiled_branches(branches_function, [x_grid, *fixed_values], x_grid.shape)
+        if evaluated is None:
+            evaluated = self._evaluate_evalf_branches(x_grid, list(expressions))
+
+        for index, branch in zip(evaluable, evaluated):
+            results[index] = (branch, "")
+        return results
+
+    @timed("evaluate")
+    def _evaluate_compiled(self, compiled_function, arguments: list, shape: tuple):
+        """Evaluate a whole (broadcast) grid in one batched call, or return None when the caller should fall back to evalf."""
+        try:
+            with np.errstate(all="ignore"):
+                return self._real_points(compiled_function(*arguments), shape)
+        except Exception:
+            return None
+
+    @timed("evaluate")
+    def _evaluate_compiled_branches(self, compiled_function, arguments: list, shape: tuple):
+        """_evaluate_compiled for a function returning one grid per branch: a list of (y_grid, valid), or None."""
+        try:
+            with np.errstate(all="ignore"):
+                evaluated = [self._real_points(values, shape) for values in compiled_function(*arguments)]
+        except Exception:
+            return None
+        return None if any(branch is None for branch in evaluated) else evaluated
+
+    @staticmethod
+    def _real_points(values, shape: tuple):
+        """(y_grid, valid) of evaluated values broadcast to shape; complex and non-finite points are invalid. None if not numeric."""
+        y_grid = np.broadcast_to(np.asarray(values), shape)
+        if y_grid.dtype == object:
+            return None
+
+        if np.iscomplexobj(y_grid):
+            valid = np.isfinite(y_grid) & (y_grid.imag == 0)
+            y_grid = y_grid.real
+        else:
+            y_grid = y_grid.astype(float)
+            valid = np.isfinite(y_grid)
+        return y_grid, valid
+
+    def _numeric_solution(self, target: str, reason: str) -> dict:
+        """Switch to numeric mode for target after the symbolic solve came up empty; `reason` says why."""
+        self.target_variable = target
+        self.index = 0
+        self.is_numeric = True
+        self._set_solutions_list([])
+        self._set_solved_expression(None)
+        self.required_list_str = self._get_required_variables()
+        num_vars = len(self.required_list_str)
+
+        if num_vars == 0:
+            # Nothing to sweep: find the one root now and carry on as an ordinary constant solution
+            roots, valid = self._solve_numeric_points(np.zeros(1), None, {})
+            self.is_numeric = False
+            if not valid[0]:
+                return {
+                    "status": "none",
+                    "status_bool": False,
+                    "solutions": [],
+                    "needs_choice": False,
+                    "error": f"No solutions found for {target}, symbolically or numerically",
+                    "target": target,
+                    "available": self.variables_list,
+                    "required_list_str": [],
+                    "formula_string": self.formula_string,
+                    "index": None
+                }
+            root = sp.Float(float(roots[0]), 15)
+            self._set_solutions_list([root])
+            self._set_solved_expression(root)
+            self.is_const = True
+            self.is_one_var = False
+            self.is_multi_var = False
+            self.equation_type = "constant"
+            self.sweeper = "const"
+            self.fixed = {}
+        elif num_vars == 1:
+            self.is_const = False
+            self.is_one_var = True
+            self.is_multi_var = False
+            self.equation_type = "one_variable"
+            self.fixed = {}
+        else:  # >= 2
+            self.is_const = False
+            self.is_one_var = False
+            self.is_multi_var = True
+            self.equation_type = "multi_variable"
+
+        return {
+            "status": "numeric",
+            "status_bool": True,
+            "solutions": self.solutions_list_strings,
+            "needs_choice": False,
+            "error": "",
+            "numeric_reason": reason,
+            "is_numeric": self.is_numeric,
+            "target": target,
+            "available": self.variables_list,
+            "required_list_str": self.required_list_str,
+            "formula_string": self.formula_string,
+            "is_const": self.is_const,
+            "is_one_var": self.is_one_var,
+            "is_multi_var": self.is_multi_var,
+            "equation_type": self.equation_type,
+            "index": self.index,
+            "sweeper": self.sweeper,
+            "fixed": self.fixed
+        }
+
+    @timed("numeric")
+    def _solve_numeric_points(self, x_grid, sweeper: Optional[str], fixed: dict):
+        """
+        Root-find the equation for target_variable at every sweeper value in x_grid, with `fixed` held.
+        Roots are continued along the sweep (see _continue_roots): Newton from the previous point's root,
+        with the sign change nearest zero in a log-spaced scan of the target, refined by safeguarded Newton,
+        only to start the sweep and wherever continuation fails.
+        Returns (roots, valid) like _evaluate_sweep_points.
+        """
+        x_grid = np.asarray(x_grid, dtype=float)
+        roots = np.full(x_grid.shape, np.nan)
+        target_symbol = self.symbols_dict[self.target_variable]
+        residual_expression = self.equation.lhs - self.equation.rhs
+        fixed_names = sorted(fixed)
+        sweeper_names = [sweeper] if sweeper and sweeper != "const" else []
+        argument_names = [self.target_variable, *sweeper_names, *fixed_names]
+        fixed_values = [fixed[name] for name in fixed_names]
+
+        residual_function = self._get_compiled_function(argument_names, residual_expression)
+        if residual_function is None:
+            return roots, np.zeros(x_grid.shape, dtype=bool)
+        slope_function = self._get_compiled_function(argument_names, sp.diff(residual_expression, target_symbol))
+
+        def evaluate(function, t_values, x_values):
+            arguments = [t_values, *([x_values] if sweeper_names else []), *fixed_values]
+            shape = np.broadcast_shapes(np.shape(t_values), np.shape(x_values))
+            evaluated = self._evaluate_compiled(function, arguments, shape) if function is not None else None
+            if evaluated is None:
+                return None
+            values, valid = evaluated
+            return np.where(valid, values, np.nan)
+
+        def residual(t_values, x_values):
+            values = evaluate(residual_function, t_values, x_values)
+            if values is None:
+                return np.full(np.broadcast_shapes(np.shape(t_values), np.shape(x_values)), np.nan)
+            return values
+
+        def slope(t_values, x_values):
+            values = evaluate(slope_function, t_values, x_values)
+            if values is None:
+                h = 1e-7 * (1 + np.abs(t_values))
+                values = (residual(t_values + h, x_values) - residual(t_values - h, x_values)) / (2 * h)
+            return values
+
+        def bracket_roots(x_values):
+            # Sign-change scan, chunked like grid sweeps so points x seeds never gets large
+            found_roots = np.full(x_values.shape, np.nan)
+            rows_per_chunk = max(1, GRID_CHUNK_POINTS // NUMERIC_SEEDS.size)
+            for row in range(0, x_values.size, rows_per_chunk):
+                x_chunk = x_values[row:row + rows_per_chunk]
+                with np.errstate(all="ignore"):
+                    scan = residual(NUMERIC_SEEDS[None, :], x_chunk[:, None])
+                    changes = np.isfinite(scan[:, :-1]) & np.isfinite(scan[:, 1:]) & (np.sign(scan[:, :-1]) * np.sign(scan[:, 1:]) <= 0)
+                distance = np.where(changes, np.minimum(np.abs(NUMERIC_SEEDS[:-1]), np.abs(NUMERIC_SEEDS[1:])), np.inf)
+                pick = distance.argmin(axis=1)
+                found = np.isfinite(distance[np.arange(x_chunk.size), pick])
+                if found.any():
+                    found_roots[row:row + x_chunk.size][found] = self._refine_bracketed(
+                        residual, slope, NUMERIC_SEEDS[pick][found], NUMERIC_SEEDS[pick + 1][found], x_chunk[found]
+                    )
+            return found_roots
+
+        def newton(seeds, x_values):
+            return self._refine_newton(residual, slope, seeds, x_values)
+
+        roots = self._continue_roots(newton, bracket_roots, x_grid)
+        solved = np.flatnonzero(np.isfinite(roots))
+        if solved.size and solved[0] > 0:
+            # Points before the first bracketed root: continue backwards from it
+            first = solved[0]
+            roots[first::-1] = self._continue_roots(newton, bracket_roots, x_grid[first::-1], roots[first])
+
+        return roots, np.isfinite(roots)
+
+    @staticmethod
+    def _refine_bracketed(residual, slope, lower, upper, x_values):
+        """Safeguarded Newton inside sign-change brackets: any step leaving the bracket becomes a bisection."""
+        with np.errstate(all="ignore"):
+            f_lower = residual(lower, x_values)
+            f_upper = residual(upper, x_values)
+            # A sign change across a pole converges to the pole, where |f| grows instead of vanishing
+            accept = np.maximum(np.minimum(np.abs(f_lower), np.abs(f_upper)), 1e-9 * (np.abs(f_lower) + np.abs(f_upper)))
+            t_values = (lower + upper) / 2
+
+            for _ in range(NUMERIC_MAX_ITERATIONS):
+                f_values = residual(t_values, x_values)
+                same_side = np.sign(f_values) == np.sign(f_lower)
+                lower = np.where(same_side, t_values, lower)
+                f_lower = np.where(same_side, f_values, f_lower)
+                upper = np.where(same_side, upper, t_values)
+
+                newton = t_values - f_values / slope(t_values, x_values)
+                inside = np.isfinite(newton) & (newton > np.minimum(lower, upper)) & (newton < np.maximum(lower, upper))
+                next_t = np.where(f_values == 0, t_values, np.where(inside, newton, (lower + upper) / 2))
+                converged = np.abs(next_t - t_values) <= NUMERIC_TOLERANCE * (1 + np.abs(t_values))
+                t_values = next_t
+                if converged.all():
+                    break
+
+            f_values = residual(t_values, x_values)
+        return np.where(np.isfinite(f_values) & (np.abs(f_values) <= accept), t_values, np.nan)
+
+    @staticmethod
+    def _refine_newton(residual, slope, t_values, x_values):
+        """Plain Newton from warm-start guesses; points that don't converge come back as NaN."""
+        converged = np.zeros(t_values.shape, dtype=bool)
+        with np.errstate(all="ignore"):
+            for _ in range(NUMERIC_MAX_ITERATIONS):
+                step = residual(t_values, x_values) / slope(t_values, x_values)
+                step = np.where(converged, 0.0, step)
+                t_values = t_values - step
+                converged |= np.isfinite(step) & (np.abs(step) <= NUMERIC_TOLERANCE * (1 + np.abs(t_values)))
+                if (converged | ~np.isfinite(t_values)).all():
+                    break
+            f_values = residual(t_values, x_values)
+        return np.where(converged & np.isfinite(t_values) & np.isfinite(f_values), t_values, np.nan)
+
+    @staticmethod
+    def _continue_roots(newton, bracket_roots, x_values, first_root=None):
+        """
+        Natural-parameter continuation along x_values: every point is Newton-solved from the root of the
+        point before it, so the sweep follows one branch instead of jumping to whichever root is nearest zero.
+        bracket_roots (the sign-change scan) only seeds the start and points where Newton doesn't converge.
+        Points are handled in blocks, all seeded from an extrapolation of the last roots; a block's roots are
+        kept as long as Newton from each one's predecessor lands on the same root, which is exactly what
+        solving the points one by one would give. `first_root`, if given, is the root at x_values[0].
+        """
+        roots = np.full(x_values.shape, np.nan)
+        solved = []   # indices of the last two finite roots
+        if first_root is not None:
+            roots[0] = first_root
+            solved.append(0)
+        i = len(solved)
+        block = NUMERIC_CONTINUATION_BLOCK
+
+        while i < x_values.size:
+            end = min(x_values.size, i + block)
+            if not solved:
+                # Nothing to continue from yet: scan until the first bracketed root
+                scanned = bracket_roots(x_values[i:end])
+                found = np.flatnonzero(np.isfinite(scanned))
+                accepted = found[0] + 1 if found.size else scanned.size
+                roots[i:i + accepted] = scanned[:accepted]
+                if found.size:
+                    solved.append(i + found[0])
+                i += accepted
+                continue
+
+            last = solved[-1]
+            seeds = np.full(end - i, roots[last])
+            if len(solved) > 1 and x_values[last] != x_values[solved[-2]]:
+                gradient = (roots[last] - roots[solved[-2]]) / (x_values[last] - x_values[solved[-2]])
+                seeds = seeds + gradient * (x_values[i:end] - x_values[last])
+            candidates = newton(seeds, x_values[i:end])
+            predecessors = np.concatenate([[roots[last]], candidates[:-1]])
+            continued = newton(predecessors, x_values[i:end])
+            with np.errstate(invalid="ignore"):
+                agree = np.isfinite(candidates) & (np.abs(candidates - continued) <= 1e-9 * (1 + np.abs(candidates)))
+            accepted = int(np.argmin(agree)) if not agree.all() else agree.size
+            roots[i:i + accepted] = candidates[:accepted]
+
+            if accepted < agree.size:
+                # continued[accepted] is Newton from the last accepted root: the one-by-one answer here
+                if np.isfinite(continued[accepted]):
+                    roots[i + accepted] = continued[accepted]
+                else:
+                    roots[i + accepted] = bracket_roots(x_values[i + accepted:i + accepted + 1])[0]
+                accepted += 1
+                block = max(NUMERIC_CONTINUATION_BLOCK, accepted)
+            else:
+                block = min(2 * block, GRID_CHUNK_POINTS)
+
+            finite = np.flatnonzero(np.isfinite(roots[i:i + accepted]))
+            solved = (solved + [i + index for index in finite[-2:].tolist()])[-2:]
+            i += accepted
+
+        return roots
+
+    def _evaluate_evalf(self, x_grid, fixed: Optional[dict] = None):
+        # Fallback for expressions lambdify can't vectorize: evaluate point by point
+        return self._evaluate_evalf_branches(x_grid, [self.solved_expression], fixed)[0]
+
+    def _evaluate_evalf_rows(self, x_grid, x_sweeper: str, y_values, y_sweeper: str, fixed: dict):
+        """_evaluate_evalf over a mesh: one row of x_grid per value in y_values, as (z_grid, valid)."""
+        rows = [
+            self._evaluate_evalf_branches(x_grid, [self.solved_expression], {**fixed, y_sweeper: y_value}, x_sweeper)[0]
+            for y_value in y_values.tolist()
+        ]
+        return np.array([z_row for z_row, _ in rows]), np.array([valid for _, valid in rows])
+
+    @timed("evalf")
+    def _evaluate_evalf_branches(self, x_grid, expressions: list, fixed: Optional[dict] = None,
+                                 sweeper: Optional[str] = None) -> list:
+        """
+        Point-by-point evaluation of several expressions of the sweeper (or `sweeper`), as a list of (y_grid, valid).
+        Subterms shared within or between the expressions (e.g. the discriminant of every root) are
+        evaluated once per point.
+        """
+        fixed = self.fixed if fixed is None else fixed
+        sweeper = self.sweeper if sweeper is None else sweeper
+        replacements, reduced = sp.cse([expression.subs(fixed) for expression in expressions])
+        symbol = self.symbols_dict.get(sweeper, sp.Symbol(sweeper))
+        y_grids = [np.full(x_grid.shape, np.nan) for _ in expressions]
+        for i, x_value in enumerate(x_grid.tolist()):
+            values = {symbol: sp.Float(x_value, 15)}
+            try:
+                for subterm, value in replacements:
+                    values[subterm] = value.xreplace(values).evalf(n=15)
+            except Exception:
+                continue
+            for y_grid, expression in zip(y_grids, reduced):
+                try:
+                    y_grid[i] = float(expression.xreplace(values).evalf(n=15))
+                except (TypeError, ValueError, ZeroDivisionError, Exception) as e:
+                    continue
+        return [(y_grid, np.isfinite(y_grid)) for y_grid in y_grids]
+
+    @staticmethod
+    def _grid_error_response(errorlist: list) -> dict:
+        return {
+            "status": "error",
+            "x_grid": None,
+            "y_grid": None,
+            "z_grid": None,
+            "skipped_count": 0,
+            "error": "; ".join(errorlist)
+        }
+
+    def _sweep_error_response(self, steps: int) -> Optional[dict]:
+        errorlist = []
+
+        if self.solved_expression is None and not self.is_numeric:
+            error1 = "No solution set."
+            errorlist.append(error1)
+
+        if steps < 2:
+            error2 = "Steps must be at least 2"
+            errorlist.append(error2)
+
+        if self.sweeper is None:
+            error3 = "no chosen sweeper"
+            errorlist.append(error3)
+
+        if len(errorlist) == 0:
+            return None
+        return {
+            "status": "error",
+            "x_values": [],
+            "y_values": [],
+            "skipped": [],
+            "error": "; ".join(errorlist),
+            "is_const": self.is_const
+        }
+
+    @staticmethod
+    def _interval_errors(x_grid, y_grid):
+        """
+        Refinement priority of each interval [x_i, x_i+1]: how far the neighbouring points stray
+        from the chord through their own neighbours, relative to the robust y range.
+        Intervals with exactly one non-finite end are infinitely urgent so domain edges get located.
+        """
+        finite = np.isfinite(y_grid)
+        errors = np.zeros(x_grid.size - 1)
+        if finite.sum() >= 2:
+            low, high = np.percentile(y_grid[finite], [5, 95])
+            scale = (high - low) or max(float(np.abs(y_grid[finite]).max()), 1.0)
+        else:
+            scale = 1.0
+
+        if x_grid.size >= 3:
+            with np.errstate(all="ignore"):
+                chord = y_grid[:-2] + (y_grid[2:] - y_grid[:-2]) * (x_grid[1:-1] - x_grid[:-2]) / (x_grid[2:] - x_grid[:-2])
+                deviation = np.nan_to_num(np.abs(y_grid[1:-1] - chord) / scale, nan=0.0, posinf=np.inf)
+            errors[:-1] = np.maximum(errors[:-1], deviation)
+            errors[1:] = np.maximum(errors[1:], deviation)
+
+        errors[finite[:-1] != finite[1:]] = np.inf
+        return errors
+
+    @staticmethod
+    def _find_poles(x_values, y_values) -> list[float]:
+        """Midpoints of intervals where the curve flips sign between values far above its typical magnitude."""
+        if x_values.size < 2:
+            return []
+        magnitude = np.abs(y_values)
+        threshold = POLE_MAGNITUDE_RATIO * max(float(np.median(magnitude)), np.finfo(float).tiny)
+        flips = (np.sign(y_values[:-1]) * np.sign(y_values[1:]) < 0)
+        large = (magnitude[:-1] > threshold) & (magnitude[1:] > threshold)
+        pole_indices = np.flatnonzero(flips & large)
+        return ((x_values[pole_indices] + x_values[pole_indices + 1]) / 2).tolist()
+
     def _set_solutions_list(self, solutions):
         self.solutions_list = solutions
         self.solutions_list_strings = [str(s) for s in solutions]
 
     def _set_solved_expression(self, expression):
         self.solved_expression = expression
-        self.solved_expression_string = str(expression) if expression else None
+        self.solved_expression_string = str(expression) if expression is not None else None
 
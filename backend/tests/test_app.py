@@ -0,0 +1,433 @@
+# tests/test_app.py
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+import solver as solver_module  # type: ignore
+import app as app_module  # type: ignore
+from app import app  # type: ignore
+
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def run_flow(client, formula="S = v*t", target="S", sweeper="t", fixed=None):
+    assert client.post("/api/set_formula", json={"formula_string": formula}).status_code == 200
+    assert client.post("/api/solve_for_target", json={"target": target}).status_code == 200
+    assert client.post("/api/pass_sweeper", json={"sweeper": sweeper}).status_code == 200
+    assert client.post("/api/verify_fixed", json={"fixed": fixed or {"v": 2}}).status_code == 200
+
+
+def test_full_flow_returns_png(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 10, "steps": 20})
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+
+
+def test_cookie_carries_only_session_id(client):
+    run_flow(client)
+    with client.session_transaction() as session:
+        assert set(session.keys()) == {"session_id"}
+
+
+def test_missing_session_is_rejected(client):
+    response = client.post("/api/solve_for_target", json={"target": "S"})
+
+    assert response.status_code == 400
+    assert "No solver session found" in response.get_json()["error"]
+
+
+def test_sweep_json_format_returns_arrays(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 3, "format": "json"})
+
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data["x_values"] == [0.0, 0.5, 1.0]
+    assert data["y_values"] == [0.0, 1.0, 2.0]
+    assert data["skipped"] == []
+
+
+def test_sweep_binary_format_is_little_endian_float64(client):
+    import struct
+
+    run_flow(client, formula="y = 1/x", target="y", sweeper="x", fixed={})
+    response = client.post("/api/perform_sweep", json={"start": -1, "end": 1, "steps": 3, "format": "binary"})
+
+    payload = response.data
+    magic, version, points, skipped = struct.unpack_from("<4sIII", payload)
+    values = struct.unpack_from(f"<{2 * points + skipped}d", payload, 16)
+    assert response.mimetype == "application/octet-stream"
+    assert (magic, version, points, skipped) == (b"MSWP", 1, 2, 1)
+    assert values == (-1.0, 1.0, -1.0, 1.0, 0.0)
+
+
+def test_sweep_rejects_unknown_format(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 3, "format": "svg"})
+
+    assert response.status_code == 400
+
+
+def test_identical_sweep_is_served_from_plot_cache_with_etag(client):
+    from app import plot_cache, renderer  # type: ignore
+
+    plot_cache.clear()
+    run_flow(client)
+    body = {"start": 0, "end": 10, "steps": 25}
+    first = client.post("/api/perform_sweep", json=body)
+    renders = renderer.stats()["renders"]
+    second = client.post("/api/perform_sweep", json=body)
+
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.data == second.data
+    assert renderer.stats()["renders"] == renders
+    assert plot_cache.stats()["hits"] == 1
+
+    revalidated = client.post("/api/perform_sweep", json=body, headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+
+def test_changed_fixed_value_changes_etag(client):
+    run_flow(client, fixed={"v": 2})
+    first = client.post("/api/perform_sweep", json={"start": 0, "end": 10, "steps": 25})
+    client.post("/api/verify_fixed", json={"fixed": {"v": 3}})
+    second = client.post("/api/perform_sweep", json={"start": 0, "end": 10, "steps": 25})
+
+    assert first.headers["ETag"] != second.headers["ETag"]
+
+
+def test_choosing_another_solution_changes_etag(client):
+    client.post("/api/set_formula", json={"formula_string": "y**2 = x"})
+    client.post("/api/solve_for_target", json={"target": "y"})
+    etags = []
+    for index in (0, 1):
+        client.post("/api/choose_solution", json={"index": index})
+        client.post("/api/pass_sweeper", json={"sweeper": "x"})
+        client.post("/api/verify_fixed", json={"fixed": {}})
+        response = client.post("/api/perform_sweep", json={"start": 0, "end": 4, "steps": 5})
+        assert response.status_code == 200
+        etags.append(response.headers["ETag"])
+
+    assert etags[0] != etags[1]
+
+
+def test_adaptive_mode_reports_poles(client):
+    run_flow(client, formula="y = 1/x", target="y", sweeper="x", fixed={})
+    body = {"start": -1, "end": 1, "steps": 300, "format": "json", "mode": "adaptive"}
+    data = client.post("/api/perform_sweep", json=body).get_json()
+
+    assert data["mode"] == "adaptive"
+    assert len(data["poles"]) == 1
+    assert client.post("/api/perform_sweep", json={**body, "format": "png"}).status_code == 200
+
+
+def test_grid_sweep_endpoint_returns_heatmap_and_raw_grid(client):
+    client.post("/api/set_formula", json={"formula_string": "z = x*y + a"})
+    client.post("/api/solve_for_target", json={"target": "z"})
+    body = {
+        "x_sweeper": "x", "y_sweeper": "y",
+        "x_start": 0, "x_end": 1, "x_steps": 3,
+        "y_start": 0, "y_end": 2, "y_steps": 2,
+        "fixed": {"a": 1}
+    }
+
+    png = client.post("/api/perform_grid_sweep", json={**body, "plot": "contour"})
+    data = client.post("/api/perform_grid_sweep", json={**body, "format": "json"}).get_json()
+
+    assert png.status_code == 200
+    assert png.mimetype == "image/png"
+    assert data["z_values"] == [[1.0, 1.0, 1.0], [1.0, 2.0, 3.0]]
+
+
+def test_fixed_sets_return_one_curve_per_set(client):
+    run_flow(client)
+    body = {"start": 0, "end": 1, "steps": 3, "fixed_sets": [{"v": 5}, {"v": 10}, {"v": 20}]}
+
+    data = client.post("/api/perform_sweep", json={**body, "format": "json"}).get_json()
+    png = client.post("/api/perform_sweep", json=body)
+
+    assert data["y_values"] == [[0.0, 2.5, 5.0], [0.0, 5.0, 10.0], [0.0, 10.0, 20.0]]
+    assert png.status_code == 200
+    assert png.mimetype == "image/png"
+
+
+def test_fixed_sets_with_non_numeric_values_are_rejected(client):
+    run_flow(client)
+    body = {"start": 0, "end": 1, "steps": 3, "format": "json", "fixed_sets": [{"v": 5}, {"v": "10"}, {"v": True}]}
+
+    response = client.post("/api/perform_sweep", json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == (
+        "fixed_sets[1].v must be float or int, we got str; fixed_sets[2].v must be float or int, we got bool"
+    )
+
+
+def test_sweeps_above_the_point_limit_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(app_module.solver_module, "SWEEP_MAX_POINTS", 10)
+    run_flow(client)
+
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 11, "format": "json"})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "sweep has 11 points, the limit is 10"
+
+    body = {"start": 0, "end": 1, "steps": 4, "format": "json", "fixed_sets": [{"v": 1}, {"v": 2}, {"v": 3}]}
+    response = client.post("/api/perform_sweep", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "sweep has 12 points, the limit is 10"
+
+    response = client.post("/api/pipeline", json={"formula_string": "S = v*t", "target": "S", "sweeper": "t",
+                                                  "fixed": {"v": 1}, "start": 0, "end": 1, "steps": 11})
+    assert response.get_json()["failed_step"] == "validate"
+    assert client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 10, "format": "json"}).status_code == 200
+
+
+def test_numeric_fallback_sweeps_without_closed_form(client):
+    assert client.post("/api/set_formula", json={"formula_string": "y = x + sin(x)*a"}).status_code == 200
+    response = client.post("/api/solve_for_target", json={"target": "x", "numeric_fallback": True})
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "numeric"
+    assert client.post("/api/pass_sweeper", json={"sweeper": "y"}).status_code == 200
+    assert client.post("/api/verify_fixed", json={"fixed": {"a": 0.5}}).status_code == 200
+
+    data = client.post("/api/perform_sweep", json={"start": -3, "end": 3, "steps": 7, "format": "json"}).get_json()
+
+    assert data["y_label"] == "x"
+    assert data["skipped"] == []
+    assert data["y_values"][3] == pytest.approx(0.0, abs=1e-12)
+
+
+def test_pipeline_endpoint_stores_the_finished_solver(client):
+    response = client.post("/api/pipeline", json={
+        "formula_string": "S = v*t", "target": "S", "sweeper": "t", "fixed": {"v": 2},
+        "start": 0, "end": 2, "steps": 3, "plot": True
+    })
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["sweep"]["y_values"] == [0.0, 2.0, 4.0]
+    assert data["sweep"]["png_base64"]
+
+    # The session now carries on from the pipeline's solver
+    sweep = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 2, "format": "json"}).get_json()
+    assert sweep["y_values"] == [0.0, 2.0]
+
+
+def test_pipeline_batch_returns_one_result_per_job(client):
+    response = client.post("/api/pipeline/batch", json={"jobs": [
+        {"formula_string": "y = x**2", "target": "y", "sweeper": "x", "start": 0, "end": 1, "steps": 2},
+        {"formula_string": "y = ", "target": "y", "start": 0, "end": 1, "steps": 2}
+    ]})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert (data["succeeded"], data["failed"]) == (1, 1)
+    assert data["results"][1]["failed_step"] == "set_formula"
+    with client.session_transaction() as session:
+        assert "session_id" not in session
+
+
+def test_crashing_batch_job_fails_alone(client, monkeypatch):
+    def broken_renderer(*args, **kwargs):
+        raise RuntimeError("renderer exploded")
+    monkeypatch.setattr(app_module.renderer, "render_line", broken_renderer)
+    job = {"formula_string": "y = x**2", "target": "y", "sweeper": "x", "start": 0, "end": 1, "steps": 2}
+
+    response = client.post("/api/pipeline/batch", json={"jobs": [job, {**job, "plot": True}]})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert (data["succeeded"], data["failed"]) == (1, 1)
+    assert data["results"][1]["error"] == "Server error: renderer exploded"
+
+
+def test_ndjson_format_streams_start_chunks_and_end(client, monkeypatch):
+    monkeypatch.setattr(solver_module, "STREAM_CHUNK_POINTS", 4)
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 9, "steps": 10, "format": "ndjson"})
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [record["type"] for record in records] == ["start", "chunk", "chunk", "chunk", "end"]
+    assert sum((record["y_values"] for record in records[1:-1]), []) == [2.0 * x for x in range(10)]
+    assert records[-1] == {"type": "end", "points": 10, "skipped_count": 0}
+
+
+def test_sse_format_uses_event_stream_framing(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 2, "format": "sse"})
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/event-stream"
+    assert body.startswith("event: start\ndata: ")
+    assert body.endswith('event: end\ndata: {"type": "end", "points": 2, "skipped_count": 0}\n\n')
+
+
+def wait_for_job(client, job_id):
+    for _ in range(200):
+        data = client.get(f"/api/jobs/{job_id}").get_json()
+        if data["status"] in ("succeeded", "failed", "cancelled"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_constant_root_can_be_swept_with_all_branches(client):
+    client.post("/api/set_formula", json={"formula_string": "x**2 = 4"})
+    client.post("/api/solve_for_target", json={"target": "x"})
+    client.post("/api/choose_solution", json={"index": 0})
+
+    body = {"start": 0, "end": 1, "steps": 3, "branches": "all"}
+    data = client.post("/api/perform_sweep", json={**body, "format": "json"}).get_json()
+    png = client.post("/api/perform_sweep", json=body)
+
+    assert data["is_const"]
+    assert sorted(branch["y_values"] for branch in data["branches"]) == [[-2.0, -2.0, -2.0], [2.0, 2.0, 2.0]]
+    assert png.mimetype == "image/png"
+
+
+def test_async_sweep_returns_job_to_poll(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 2, "steps": 3, "format": "json", "async": True})
+
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.headers["Location"] == f"/api/jobs/{job_id}"
+
+    data = wait_for_job(client, job_id)
+    assert data["status"] == "succeeded"
+    assert data["progress"] == 1.0
+    assert data["result"]["y_values"] == [0.0, 2.0, 4.0]
+
+
+def test_async_png_result_is_fetched_separately(client):
+    run_flow(client)
+    job_id = client.post("/api/perform_sweep", json={"start": 0, "end": 2, "steps": 3, "async": True}).get_json()["job_id"]
+
+    data = wait_for_job(client, job_id)
+    response = client.get(data["result_url"])
+
+    assert response.mimetype == "image/png"
+
+
+def test_async_png_is_answered_from_the_plot_cache(client, monkeypatch):
+    run_flow(client)
+    body = {"start": 0, "end": 2, "steps": 7}
+    png = client.post("/api/perform_sweep", json=body)
+
+    def no_rendering(*args, **kwargs):
+        raise AssertionError("cached plot was drawn again")
+    monkeypatch.setattr(app_module.renderer, "render_line", no_rendering)
+
+    revalidated = client.post("/api/perform_sweep", json={**body, "async": True}, headers={"If-None-Match": png.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+    response = client.post("/api/perform_sweep", json={**body, "async": True})
+    assert response.status_code == 202
+    data = wait_for_job(client, response.get_json()["job_id"])
+    assert client.get(data["result_url"]).data == png.data
+
+
+def test_async_family_sweep_matches_the_synchronous_one(client):
+    run_flow(client)
+    body = {"start": 0, "end": 1, "steps": 3, "format": "json", "fixed_sets": [{"v": 5}, {"v": 10}]}
+    expected = client.post("/api/perform_sweep", json=body).get_json()
+
+    job_id = client.post("/api/perform_sweep", json={**body, "async": True}).get_json()["job_id"]
+    result = wait_for_job(client, job_id)["result"]
+
+    assert result == {key: value for key, value in expected.items() if key not in ("status", "status_bool", "error")}
+
+
+def test_jobs_are_private_to_their_session(client):
+    run_flow(client)
+    job_id = client.post("/api/perform_sweep", json={"start": 0, "end": 2, "steps": 3, "format": "json", "async": True}).get_json()["job_id"]
+    wait_for_job(client, job_id)
+
+    with app.test_client() as other:
+        assert other.get(f"/api/jobs/{job_id}").status_code == 404
+        assert other.delete(f"/api/jobs/{job_id}").status_code == 404
+
+
+def test_responses_carry_server_timing(client):
+    response = client.post("/api/set_formula", json={"formula_string": "S = v*t"})
+
+    metrics = [metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")]
+    assert {"cookie", "parse", "session_save"} <= set(metrics)
+    assert metrics[-1] == "total"
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    run_flow(client)
+    response = client.get("/api/metrics")
+    text = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/plain"
+    assert "# TYPE math_solver_stage_seconds histogram" in text
+    assert 'math_solver_request_seconds_count{endpoint="/api/set_formula",method="POST",status="200"}' in text
+    assert 'math_solver_cache_hits{cache="solve"}' in text
+
+
+def test_signed_requests_are_profiled_and_downloadable(client, monkeypatch):
+    from app import profile_store  # type: ignore
+    from profiling import sign_request  # type: ignore
+
+    monkeypatch.setitem(app.config, "PROFILE_SECRET", "secret")
+    client.post("/api/set_formula", json={"formula_string": "S = v*t"})
+    assert "X-Profile-Id" not in client.post("/api/solve_for_target", json={"target": "S"}).headers
+
+    header = {"X-Profile": sign_request("secret", "POST", "/api/solve_for_target")}
+    profile_id = client.post("/api/solve_for_target", json={"target": "S"}, headers=header).headers["X-Profile-Id"]
+    admin = {"Authorization": "Bearer secret"}
+
+    assert client.get("/api/profiles").status_code == 403
+    listed = client.get("/api/profiles", headers=admin).get_json()["profiles"]
+    assert listed[0]["profile_id"] == profile_id
+    assert listed[0]["endpoint"] == "/api/solve_for_target"
+    assert client.get(f"/api/profiles/{profile_id}", headers=admin).mimetype == "application/octet-stream"
+    assert "solve_for_target" in client.get(f"/api/profiles/{profile_id}?format=collapsed", headers=admin).get_data(as_text=True)
+    profile_store.clear()
+
+
+def test_profiles_are_unavailable_without_a_secret(client):
+    assert client.get("/api/profiles").status_code == 404
+
+
+def test_all_branches_are_swept_in_one_request(client):
+    client.post("/api/set_formula", json={"formula_string": "y = a*x**2"})
+    client.post("/api/solve_for_target", json={"target": "x"})
+    client.post("/api/choose_solution", json={"index": 0})
+    client.post("/api/pass_sweeper", json={"sweeper": "y"})
+    client.post("/api/verify_fixed", json={"fixed": {"a": 1}})
+
+    data = client.post("/api/perform_sweep", json={"start": -1, "end": 4, "steps": 6, "format": "json", "branches": "all"}).get_json()
+
+    assert data["x_values"] == [-1.0, 0.0, 1.0, 2.0, 3.0, 4.0]
+    assert [branch["y_values"] for branch in data["branches"]] == [
+        [None, -0.0, -1.0, pytest.approx(-2 ** 0.5), pytest.approx(-3 ** 0.5), -2.0],
+        [None, 0.0, 1.0, pytest.approx(2 ** 0.5), pytest.approx(3 ** 0.5), 2.0]
+    ]
+    assert data["branches"][0]["skipped"] == [True, False, False, False, False, False]
+
+    png = client.post("/api/perform_sweep", json={"start": -1, "end": 4, "steps": 6, "branches": "all"})
+    assert png.mimetype == "image/png"
+
+
+def test_all_branches_rejects_other_sweep_modes(client):
+    run_flow(client)
+    response = client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 3, "branches": "all", "mode": "adaptive"})
+
+    assert response.status_code == 400
+    assert client.post("/api/perform_sweep", json={"start": 0, "end": 1, "steps": 3, "branches": "some"}).status_code == 400
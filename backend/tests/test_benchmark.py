@@ -0,0 +1,37 @@
+# tests/test_benchmark.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark import compare_results, main, run_benchmarks  # type: ignore
+
+
+def results(**medians):
+    return {"results": {name.replace("__", "/"): {"median": median} for name, median in medians.items()}}
+
+
+def test_run_benchmarks_reports_timings():
+    document = run_benchmarks("round_trip/100", repeat=2)
+
+    assert list(document["results"]) == ["round_trip/100"]
+    result = document["results"]["round_trip/100"]
+    assert result["runs"] == 2
+    assert 0 < result["min"] <= result["median"]
+    assert "numpy" in document["environment"]
+
+
+def test_compare_flags_changes_beyond_threshold():
+    rows = compare_results(results(a=1.0, b=1.0, c=1.0, gone=1.0), results(a=1.05, b=1.5, c=0.5, new=1.0), threshold=0.1)
+
+    assert {row["name"]: row["verdict"] for row in rows} == {"a": "same", "b": "slower", "c": "faster"}
+
+
+def test_compare_exits_nonzero_on_regression(tmp_path):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(results(set_formula=1.0)))
+    current.write_text(json.dumps(results(set_formula=2.0)))
+
+    assert main(["--compare", str(baseline), "--against", str(current)]) == 1
+    assert main(["--compare", str(baseline), "--against", str(baseline)]) == 0
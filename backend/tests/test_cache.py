@@ -0,0 +1,96 @@
+# tests/test_cache.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cache import LRUCache  # type: ignore
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("c") == 3
+
+
+def test_lru_counts_hits_and_misses():
+    cache = LRUCache(maxsize=4)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 1, "misses": 1}
+
+
+def test_lru_resize_trims_oldest():
+    cache = LRUCache(maxsize=3)
+    for key in "abc":
+        cache.put(key, key)
+    cache.resize(1)
+
+    assert len(cache) == 1
+    assert "c" in cache
+
+
+def test_solve_cache_survives_a_new_process_via_disk(tmp_path):
+    from cache import SolveCache  # type: ignore
+
+    writer = SolveCache(maxsize=4, directory=str(tmp_path))
+    writer.put(("Eq(x, y)", "x"), ["y"], formula_string="x = y", target="x")
+
+    reader = SolveCache(maxsize=4, directory=str(tmp_path))
+    assert reader.get(("Eq(x, y)", "x")) == ["y"]
+    assert reader.stats()["disk_hits"] == 1
+    assert reader.get(("Eq(x, y)", "y")) is None
+
+
+def test_most_used_orders_disk_entries_by_hits(tmp_path):
+    from cache import SolveCache  # type: ignore
+
+    cache = SolveCache(maxsize=4, directory=str(tmp_path))
+    cache.put(("Eq(x, y)", "x"), ["y"], formula_string="x = y", target="x")
+    cache.put(("Eq(S, t*v)", "S"), ["t*v"], formula_string="S = v*t", target="S")
+
+    reader = SolveCache(maxsize=4, directory=str(tmp_path))
+    reader.get(("Eq(S, t*v)", "S"))
+
+    assert reader.most_used(2) == [("S = v*t", "S"), ("x = y", "x")]
+    assert reader.most_used(1) == [("S = v*t", "S")]
+    assert SolveCache(maxsize=4).most_used(5) == []
+
+
+def test_solve_for_target_reuses_cached_solutions(tmp_path):
+    import solver as solver_module  # type: ignore
+
+    solver_module.SOLVE_CACHE.clear()
+    first = solver_module.FormulaSolver()
+    first.set_formula("y**2 = x")
+    first.solve_for_target("y")
+
+    second = solver_module.FormulaSolver()
+    second.set_formula("y**2=x")
+    response = second.solve_for_target("y")
+
+    assert solver_module.SOLVE_CACHE.stats()["hits"] == 1
+    assert response["status"] == "multiple"
+    assert response["solutions"] == first.solutions_list_strings
+
+
+def test_bytes_lru_is_bounded_by_total_size():
+    from cache import BytesLRUCache  # type: ignore
+
+    cache = BytesLRUCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.put("c", b"1234")
+    cache.put("huge", b"x" * 11)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == b"1234"
+    assert cache.stats()["bytes"] == 8
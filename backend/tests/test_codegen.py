@@ -0,0 +1,54 @@
+# tests/test_codegen.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import sympy as sp
+from codegen import KernelCache, generate_source  # type: ignore
+
+x, a, b = sp.symbols("x a b")
+
+
+def test_source_hoists_common_subexpressions():
+    source = generate_source([x, a], [sp.sqrt(a * x) + 1, 1 - sp.sqrt(a * x)])
+
+    assert source.count("numpy.sqrt") == 1
+    assert "return (" in source
+
+
+def test_kernel_matches_lambdify():
+    expression = (-b + sp.sqrt(b**2 - 4 * a * x)) / (2 * a)
+    kernel = KernelCache().load([x, a, b], [expression])
+    values = np.linspace(-5, 5, 101)
+
+    with np.errstate(all="ignore"):
+        expected = sp.lambdify([x, a, b], expression, "numpy")(values, 1.5, 3.0)
+        np.testing.assert_allclose(kernel(values, 1.5, 3.0), expected, equal_nan=True)
+
+
+def test_variables_named_like_modules_still_work():
+    numpy_symbol = sp.Symbol("numpy")
+    kernel = KernelCache().load([numpy_symbol], [sp.sin(numpy_symbol) + 1])
+
+    assert kernel(0.0) == 1.0
+
+
+def test_kernels_are_reused_from_disk(tmp_path):
+    KernelCache(str(tmp_path)).load([x, a], [a * x**2])
+    assert len(list(tmp_path.glob("kernel_*.py"))) == 1
+
+    later = KernelCache(str(tmp_path))
+    kernel = later.load([x, a], [a * x**2])
+
+    assert kernel(3.0, 2.0) == 18.0
+    assert later.stats()["disk_hits"] == 1
+    assert later.stats()["generated"] == 0
+
+
+def test_unprintable_expressions_return_none():
+    cache = KernelCache()
+
+    assert cache.load([x], [sp.LambertW(x)]) is None
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,41 @@
+# tests/test_formula_tokens.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+import solver as solver_module  # type: ignore
+from solver import FormulaSolver, tokenize_formula  # type: ignore
+
+
+def test_tokenizer_collects_variables_calls_and_implied_multiplication():
+    tokens = tokenize_formula("y = sin(x)*a_1 + pi*sqrt(b)")
+
+    assert tokens.variables == ("a_1", "b", "x", "y")
+    assert tokens.calls == ("sin", "sqrt")
+    assert not tokens.implied
+
+
+@pytest.mark.parametrize("formula", ["y = 3a", "y = 3(a+b)", "y = (a)b", "y = (a)(b)", "y = x2y", "y = f2(x)"])
+def test_tokenizer_flags_implied_multiplication(formula):
+    assert tokenize_formula(formula).implied
+
+
+def test_name_glued_to_a_non_ascii_letter_is_not_a_call():
+    # Same as the \b-based check this replaced: "éa(" is one word, not a call of a
+    tokens = tokenize_formula("y = éa(x) + b(x)")
+
+    assert tokens.calls == ("b",)
+    assert tokens.variables == ("a", "b", "x", "y")
+    assert FormulaSolver().set_formula("y = éa(x)")["status_bool"]
+
+
+def test_formula_is_tokenized_once_per_string():
+    solver_module.TOKEN_CACHE.clear()
+    solver = FormulaSolver()
+    solver.set_formula("  S = v*t  ")
+    FormulaSolver.from_dict({"formula_string": "S = v*t"})
+
+    assert solver_module.TOKEN_CACHE.stats()["misses"] == 1
+    assert solver.variables_list == ["S", "t", "v"]
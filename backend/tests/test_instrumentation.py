@@ -0,0 +1,55 @@
+# tests/test_instrumentation.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from instrumentation import (  # type: ignore
+    Histogram, begin_request, end_request, record_stage, server_timing_header, stage, timed
+)
+
+
+def test_stages_are_collected_only_inside_a_request():
+    record_stage("outside", 0.5)
+    begin_request()
+    with stage("parse"):
+        pass
+    record_stage("evaluate", 0.25)
+    total, stages = end_request()
+
+    assert total > 0
+    assert [name for name, _ in stages] == ["parse", "evaluate"]
+    assert end_request() == (0.0, [])
+
+
+def test_timed_decorator_records_the_call():
+    @timed("compile")
+    def compile_something():
+        return 42
+
+    begin_request()
+    assert compile_something() == 42
+    _, stages = end_request()
+
+    assert [name for name, _ in stages] == ["compile"]
+
+
+def test_server_timing_sums_repeated_stages():
+    header = server_timing_header(0.01, [("evaluate", 0.002), ("savefig", 0.003), ("evaluate", 0.001)])
+
+    assert header == "evaluate;dur=3.000, savefig;dur=3.000, total;dur=10.000"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        histogram.observe(("parse",), seconds)
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="parse",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="parse"} 3' in lines
+    assert 'test_seconds_recent{stage="parse",quantile="0.5"} 0.5' in lines
+    assert histogram.summary()["parse"]["count"] == 3
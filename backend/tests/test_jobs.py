@@ -0,0 +1,66 @@
+# tests/test_jobs.py
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from jobs import JobCancelledError, JobLimitError, JobManager  # type: ignore
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2, per_owner_limit=1)
+    yield manager
+    manager.shutdown()
+
+
+def test_job_result_and_progress(manager):
+    def work(job):
+        job.progress = 0.5
+        return {"answer": 42}
+
+    job = manager.submit("session-a", "test", work)
+    job.future.result(timeout=5)
+
+    assert job.status == "succeeded"
+    assert job.progress == 1.0
+    assert job.result == {"answer": 42}
+    assert manager.get(job.id, "session-b") is None
+
+
+def test_failed_work_keeps_the_error(manager):
+    def work(job):
+        raise ValueError("steps must be at least 2")
+
+    job = manager.submit("session-a", "test", work)
+    job.future.result(timeout=5)
+
+    assert job.status == "failed"
+    assert job.error == "steps must be at least 2"
+
+
+def test_per_owner_limit_and_cancellation(manager):
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        job.cancel_event.wait(5)
+        raise JobCancelledError()
+
+    job = manager.submit("session-a", "test", work)
+    started.wait(5)
+
+    with pytest.raises(JobLimitError):
+        manager.submit("session-a", "test", work)
+    other = manager.submit("session-b", "test", lambda job: None)
+
+    manager.cancel(job.id, "session-a")
+    job.future.result(timeout=5)
+    other.future.result(timeout=5)
+
+    assert job.status == "cancelled"
+    assert manager.stats()["cancelled"] == 1
+    # Finished jobs no longer count against the limit
+    manager.submit("session-a", "test", lambda job: None).future.result(timeout=5)
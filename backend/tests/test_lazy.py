@@ -0,0 +1,37 @@
+# tests/test_lazy.py
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lazy import LazyModule, preload  # type: ignore
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    module = LazyModule("colorsys")
+    assert not module.loaded
+
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert module.loaded
+
+
+def test_importing_the_app_leaves_sympy_and_matplotlib_unloaded():
+    check = (
+        "import sys, app; "
+        "print('sympy' in sys.modules, 'matplotlib' in sys.modules); "
+        "app.preload(); "
+        "print('sympy' in sys.modules, 'matplotlib' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", check], cwd=BACKEND, capture_output=True, text=True, check=True).stdout
+
+    assert output.split() == ["False", "False", "True", "True"]
+
+
+def test_preload_loads_every_module():
+    modules = [LazyModule("json"), LazyModule("colorsys")]
+    preload(*modules)
+
+    assert all(module.loaded for module in modules)
@@ -0,0 +1,50 @@
+# tests/test_pipeline.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pipeline import run_pipeline  # type: ignore
+
+
+def test_pipeline_runs_every_step_the_formula_needs():
+    result, solver = run_pipeline({
+        "formula_string": "y**2 = x*a", "target": "y", "index": 1,
+        "sweeper": "x", "fixed": {"a": 4}, "start": 0, "end": 4, "steps": 5
+    })
+
+    assert result["status"] == "success"
+    assert list(result["steps"]) == ["set_formula", "solve_for_target", "choose_solution", "pass_sweeper", "verify_fixed"]
+    assert result["sweep"]["y_values"] == [0.0, 2.0, 2.8284271247461903, 3.4641016151377544, 4.0]
+    assert solver.fixed == {"a": 4}
+
+
+def test_pipeline_skips_sweeper_and_fixed_for_constants():
+    result, _ = run_pipeline({"formula_string": "c = 2 + 3", "target": "c", "start": 0, "end": 1, "steps": 2})
+
+    assert result["status_bool"]
+    assert list(result["steps"]) == ["set_formula", "solve_for_target"]
+    assert result["sweep"]["y_values"] == [5.0, 5.0]
+
+
+def test_pipeline_reports_the_step_that_failed():
+    result, _ = run_pipeline({"formula_string": "y**2 = x", "target": "y", "sweeper": "x", "start": 0, "end": 1, "steps": 2})
+    assert result["failed_step"] == "choose_solution"
+    assert "index is required" in result["error"]
+
+    result, solver = run_pipeline({"formula_string": "S = v*t", "target": "S", "start": 0, "end": 1, "steps": "2"})
+    assert result["failed_step"] == "validate"
+    assert result["error"] == "steps must be float or int, we got str"
+    assert solver is None
+
+
+def test_pipeline_treats_null_optional_fields_as_defaults():
+    job = {"formula_string": "y = x**2", "target": "y", "sweeper": "x", "start": 0, "end": 1, "steps": 9,
+           "mode": "adaptive", "tolerance": None, "numeric_fallback": None}
+    result, _ = run_pipeline(job)
+    assert result["status_bool"]
+    assert result["sweep"]["mode"] == "adaptive"
+
+    result, _ = run_pipeline({**job, "tolerance": "tight"})
+    assert result["failed_step"] == "validate"
+    assert result["error"] == "tolerance must be float or int, we got str"
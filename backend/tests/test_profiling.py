@@ -0,0 +1,75 @@
+# tests/test_profiling.py
+import cProfile
+import os
+import pstats
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from profiling import ProfileStore, RequestProfile, RequestProfiler, sign_request, verify_signature  # type: ignore
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def work():
+    return sum(fib(12) for _ in range(20))
+
+
+def profile_of(function):
+    profiler = cProfile.Profile()
+    profiler.runcall(function)
+    profiler.create_stats()
+    return RequestProfile("POST", "/api/test", "/api/test", 200, 0.1, profiler.stats)
+
+
+def test_pstats_export_loads_in_pstats(tmp_path):
+    path = tmp_path / "profile.prof"
+    path.write_bytes(profile_of(work).to_pstats())
+
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert {"work", "fib"} <= functions
+
+
+def test_collapsed_stacks_nest_callees_under_callers():
+    lines = profile_of(work).to_collapsed().splitlines()
+    paths = [line.rsplit(" ", 1)[0] for line in lines]
+
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any("(work);" in path and path.split(";")[-1].endswith("(<genexpr>)") for path in paths)
+    # Recursion is cut: fib appears at most once per path
+    assert all(path.count("(fib)") <= 1 for path in paths)
+
+
+def test_store_keeps_only_the_newest_profiles():
+    store = ProfileStore(maxlen=2)
+    profiles = [profile_of(lambda: None) for _ in range(3)]
+    for profile in profiles:
+        store.add(profile)
+
+    assert store.list() == [profiles[2], profiles[1]]
+    assert store.get(profiles[0].id) is None
+
+
+def test_only_one_request_is_profiled_at_a_time():
+    profiler = RequestProfiler()
+    first = profiler.start()
+
+    assert first is not None
+    assert profiler.start() is None
+    profiler.stop(first)
+    second = profiler.start()
+    assert second is not None
+    profiler.stop(second)
+
+
+def test_signature_is_bound_to_secret_request_and_time():
+    value = sign_request("secret", "POST", "/api/solve_for_target", timestamp=1000)
+
+    assert verify_signature("secret", value, "POST", "/api/solve_for_target", now=1010)
+    assert not verify_signature("other", value, "POST", "/api/solve_for_target", now=1010)
+    assert not verify_signature("secret", value, "POST", "/api/perform_sweep", now=1010)
+    assert not verify_signature("secret", value, "POST", "/api/solve_for_target", now=5000)
+    assert not verify_signature("", value, "POST", "/api/solve_for_target", now=1010)
+    assert not verify_signature("secret", "garbage", "POST", "/api/solve_for_target", now=1010)
@@ -0,0 +1,33 @@
+# tests/test_renderer.py
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from renderer import PlotRenderer  # type: ignore
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_reuses_the_thread_figure_and_rescales():
+    renderer = PlotRenderer(figsize=(4, 3), dpi=50)
+    renderer.render_line([0, 1], [0, 1000], "x", "y")
+    png = renderer.render_line([0, 1], [0, 1], "x", "y", skipped_count=2)
+
+    plot = renderer._local.line_plot
+    assert png.startswith(PNG_SIGNATURE)
+    assert plot.axes.get_ylim()[1] < 2
+    assert plot.note.get_visible()
+    assert renderer.stats()["figures_built"] == 1
+    assert renderer.stats()["renders"] == 2
+
+
+def test_concurrent_renders_use_one_figure_per_thread():
+    renderer = PlotRenderer(figsize=(4, 3), dpi=50)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        images = list(pool.map(lambda n: renderer.render_line(range(n + 2), range(n + 2), "x", "y"), range(16)))
+
+    assert all(image.startswith(PNG_SIGNATURE) for image in images)
+    assert renderer.stats()["renders"] == 16
+    assert renderer.stats()["figures_built"] <= 4
@@ -0,0 +1,156 @@
+# tests/test_session_store.py
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from solver import FormulaSolver  # type: ignore
+from session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore  # type: ignore
+
+
+class FakeRedis:
+    """Just enough of the redis-py client for RedisSessionStore."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+
+    def expire(self, key, seconds):
+        return key in self.data
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def solved_solver():
+    solver = FormulaSolver()
+    solver.set_formula("S = v*t")
+    solver.solve_for_target("S")
+    solver.pass_sweeper("t")
+    solver.verify_fixed({"v": 2})
+    solver.perform_sweep(0, 1, 5)
+    return solver
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl=60)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=60)
+    return RedisSessionStore(FakeRedis(), ttl=60)
+
+
+def test_round_trip_keeps_state_but_drops_sweep_arrays(store):
+    store.save("abc", solved_solver())
+    solver = store.load("abc")
+
+    assert solver.solved_expression_string == "t*v"
+    assert solver.sweeper == "t"
+    assert solver.fixed == {"v": 2}
+    assert solver.x_values == []
+    assert store.load("missing") is None
+
+
+def test_failed_request_mutations_are_not_persisted(store):
+    store.save("abc", solved_solver())
+    solver = store.load("abc")
+    solver.pass_sweeper("nope")
+
+    assert store.load("abc").equation_type == "multi_variable"
+
+
+def test_delete_forgets_session(store):
+    store.save("abc", solved_solver())
+    store.delete("abc")
+
+    assert store.load("abc") is None
+
+
+def test_serialized_store_reuses_live_solver_without_rehydration():
+    store = RedisSessionStore(FakeRedis(), ttl=60)
+    store.save("abc", solved_solver())
+
+    first = store.load("abc")
+    second = store.load("abc")
+    assert first.solved_expression is second.solved_expression
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_matching_revision_skips_reading_the_payload(backend, tmp_path, monkeypatch):
+    if backend == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=60)
+    else:
+        store = RedisSessionStore(FakeRedis(), ttl=60)
+    store.save("abc", solved_solver())
+    reads = []
+    read_payload = store._read_payload
+    monkeypatch.setattr(store, "_read_payload", lambda session_id: reads.append(session_id) or read_payload(session_id))
+
+    store.load("abc")
+    assert reads == []
+
+    store.live.clear()
+    assert store.load("abc").sweeper == "t"
+    assert reads == ["abc"]
+
+
+def test_sqlite_store_replaces_tables_without_a_revision_column(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sessions (id TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)")
+        connection.execute("INSERT INTO sessions VALUES ('abc', '{}', 1e12)")
+
+    store = SQLiteSessionStore(path, ttl=60)
+    assert store.load("abc") is None
+    store.save("abc", solved_solver())
+    assert store.load("abc").sweeper == "t"
+
+
+def test_memory_store_expires_sessions():
+    store = MemorySessionStore(ttl=-1)
+    store.save("abc", solved_solver())
+
+    assert store.load("abc") is None
+
+
+def test_from_dict_defers_sympy_rehydration():
+    original = solved_solver()
+    solver = FormulaSolver.from_dict(original.to_dict())
+
+    assert solver._equation_pending and solver._solved_expression_pending
+    assert solver.verify_fixed({"v": 3})["is_fixed_correct"]
+    assert solver._equation_pending and solver._solved_expression_pending
+
+    assert solver.equation == original.equation
+    assert solver.solved_expression == original.solved_expression
+    assert solver.solutions_list == original.solutions_list
+    assert solver.perform_sweep(0, 1, 3)["y_values"] == [0.0, 1.5, 3.0]
+
+
+def test_rehydration_keeps_variables_named_like_sympy_objects():
+    solver = FormulaSolver()
+    solver.set_formula("S = beta*t")
+    solver.solve_for_target("t")
+
+    restored = FormulaSolver.from_dict(solver.to_dict())
+
+    assert restored.solved_expression == solver.solved_expression
+    assert restored.solutions_list == solver.solutions_list
+
+
+def test_failed_rehydration_is_retried_instead_of_forgotten():
+    solver = FormulaSolver.from_dict({"formula_string": "y = x", "solved_expression_string": "x +* 2"})
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            solver.solved_expression
+    assert solver._solved_expression_pending
@@ -0,0 +1,79 @@
+# tests/test_solve_pool.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+import solver as solver_module  # type: ignore
+from solve_pool import SolvePool, SolvePoolBusyError, SolveTimeoutError  # type: ignore
+
+
+# Takes sympy well over a millisecond even in a warm worker
+CUBIC = "Equality(Symbol('y'), Add(Pow(Symbol('x'), Integer(3)), Mul(Symbol('a'), Symbol('x')), Integer(1)))"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SolvePool(max_workers=1, timeout=60, memory_limit_mb=None, queue_timeout=0.05)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_solves_in_a_worker_process(pool):
+    assert pool.solve("Equality(Symbol('y'), Mul(Integer(2), Symbol('x')))", "x") == [
+        "Mul(Rational(1, 2), Symbol('y'))"
+    ]
+    assert pool.stats()["completed"] >= 1
+
+
+def test_overrun_kills_the_worker_and_reports_timeout():
+    fresh = SolvePool(max_workers=1, timeout=0.001, memory_limit_mb=None)
+    try:
+        with pytest.raises(SolveTimeoutError):
+            fresh.solve(CUBIC, "x")
+
+        assert fresh.stats()["timeouts"] == 1
+        # The killed worker is replaced right away
+        assert fresh.stats()["workers"] == 1
+        assert fresh.stats()["busy"] == 0
+    finally:
+        fresh.shutdown()
+
+
+def test_worker_startup_does_not_count_against_the_deadline():
+    # Spawning a worker and importing sympy takes far longer than this deadline
+    fresh = SolvePool(max_workers=1, timeout=0.2, memory_limit_mb=None)
+    try:
+        fresh.start()
+        assert fresh.stats()["workers"] == 1
+        assert fresh.solve("Equality(Symbol('y'), Symbol('x'))", "x") == ["Symbol('y')"]
+    finally:
+        fresh.shutdown()
+
+
+def test_saturated_pool_rejects_and_counts(pool):
+    worker = pool._acquire()
+    try:
+        with pytest.raises(SolvePoolBusyError):
+            pool.solve("Equality(Symbol('y'), Symbol('x'))", "x")
+        assert pool.stats()["saturated"]
+    finally:
+        pool._release(worker)
+
+    assert pool.stats()["rejected"] == 1
+
+
+def test_solve_for_target_reports_timeout_status():
+    solver_module.SOLVE_CACHE.clear()
+    solver_module.configure_solve_pool(SolvePool(max_workers=1, timeout=0.001, memory_limit_mb=None))
+    try:
+        solver = solver_module.FormulaSolver()
+        solver.set_formula("y = x**3 + x")
+        response = solver.solve_for_target("x")
+    finally:
+        solver_module.configure_solve_pool(None)
+
+    assert response["status"] == "timeout"
+    assert response["status_bool"] is False
+    assert "timed out" in response["error"]
@@ -0,0 +1,320 @@
+# tests/test_sweep.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+from solver import FormulaSolver  # type: ignore
+
+
+def make_solver(formula, target, sweeper, fixed=None, index=None):
+    solver = FormulaSolver()
+    assert solver.set_formula(formula)["status_bool"]
+    assert solver.solve_for_target(target)["status_bool"]
+    if index is not None:
+        assert solver.choose_solution(index)["status_bool"]
+    assert solver.pass_sweeper(sweeper)["status_bool"]
+    if fixed:
+        assert solver.verify_fixed(fixed)["is_fixed_correct"]
+    return solver
+
+
+def evalf_reference(solver, start, end, steps):
+    expression = solver.solved_expression.subs(solver.fixed)
+    symbol = solver.symbols_dict[solver.sweeper]
+    step = (end - start) / (steps - 1)
+    x_values, y_values, skipped = [], [], []
+    for i in range(steps):
+        x_value = start + (i * step)
+        try:
+            y_values.append(float(expression.subs(symbol, x_value).evalf(n=15)))
+            x_values.append(x_value)
+        except Exception:
+            skipped.append(x_value)
+    return x_values, y_values, skipped
+
+
+@pytest.mark.parametrize("formula, target, sweeper, fixed, index", [
+    ("S = v*t", "S", "t", {"v": 3}, None),
+    ("y = 1/x", "y", "x", None, None),
+    ("y = sqrt(x)", "y", "x", None, None),
+    ("y = log(x) + sin(x)", "y", "x", None, None),
+    ("y**2 = x", "y", "x", None, 1),
+])
+def test_compiled_sweep_matches_evalf(formula, target, sweeper, fixed, index):
+    solver = make_solver(formula, target, sweeper, fixed, index)
+    result = solver.perform_sweep(-4, 4, 81)
+    x_ref, y_ref, skipped_ref = evalf_reference(solver, -4, 4, 81)
+
+    assert result["status"] == "success"
+    assert result["x_values"] == x_ref
+    assert result["skipped"] == skipped_ref
+    assert result["y_values"] == pytest.approx(y_ref, rel=1e-12)
+
+
+def test_uncompilable_expression_falls_back_to_evalf():
+    solver = make_solver("y = factorial(x)", "y", "x")
+    result = solver.perform_sweep(0, 5, 6)
+
+    assert result["status"] == "success"
+    assert result["y_values"] == [1.0, 1.0, 2.0, 6.0, 24.0, 120.0]
+
+
+def test_repeat_sweeps_reuse_compiled_function():
+    from solver import COMPILED_CACHE  # type: ignore
+
+    COMPILED_CACHE.clear()
+    first = make_solver("S = v*t", "S", "t", {"v": 2})
+    first.perform_sweep(0, 1, 5)
+    second = make_solver("S = v*t", "S", "t", {"v": 7})
+    result = second.perform_sweep(0, 1, 5)
+
+    assert COMPILED_CACHE.stats()["misses"] == 1
+    assert COMPILED_CACHE.stats()["hits"] == 1
+    assert result["y_values"] == pytest.approx([0, 1.75, 3.5, 5.25, 7])
+
+
+def test_adaptive_sweep_concentrates_points_and_marks_poles():
+    solver = make_solver("y = 1/(x - 0.3)", "y", "x")
+    result = solver.perform_adaptive_sweep(-1, 1, 400, tolerance=1e-3)
+
+    assert result["status"] == "success"
+    assert result["evaluations"] <= 400
+    assert len(result["poles"]) == 1
+    assert result["poles"][0] == pytest.approx(0.3, abs=1e-3)
+
+
+def test_adaptive_sweep_stops_early_on_smooth_curves():
+    solver = make_solver("y = x**2", "y", "x")
+    result = solver.perform_adaptive_sweep(-4, 4, 10000, tolerance=1e-3)
+
+    assert result["evaluations"] < 500
+    assert result["poles"] == []
+    assert result["y_values"] == pytest.approx([x ** 2 for x in result["x_values"]])
+
+
+def test_grid_sweep_matches_pointwise_values_across_chunks(monkeypatch):
+    import solver as solver_module  # type: ignore
+
+    monkeypatch.setattr(solver_module, "GRID_CHUNK_POINTS", 7)
+    solver = FormulaSolver()
+    solver.set_formula("z = a*x/y")
+    solver.solve_for_target("z")
+    result = solver.perform_grid_sweep("x", "y", (0, 2, 5), (-1, 1, 3), {"a": 2})
+
+    assert result["status"] == "success"
+    assert result["z_grid"].shape == (3, 5)
+    assert result["z_grid"][0].tolist() == pytest.approx([0, -1, -2, -3, -4])
+    assert result["skipped_count"] == 5
+
+
+def test_grid_sweep_falls_back_to_evalf_when_the_kernel_fails(monkeypatch):
+    import solver as solver_module  # type: ignore
+
+    solver = FormulaSolver()
+    solver.set_formula("y = factorial(x)*a + b")
+    solver.solve_for_target("y")
+    result = solver.perform_grid_sweep("x", "a", (0, 3, 4), (0, 1, 2), {"b": 1})
+
+    assert result["status"] == "success"
+    assert result["z_grid"].tolist() == [[1.0, 1.0, 1.0, 1.0], [2.0, 2.0, 3.0, 7.0]]
+
+    monkeypatch.setattr(solver_module, "GRID_EVALF_MAX_POINTS", 7)
+    result = solver.perform_grid_sweep("x", "a", (0, 3, 4), (0, 1, 2), {"b": 1})
+    assert result["status"] == "error"
+    assert "can't be vectorized" in result["error"]
+
+
+def test_grid_sweep_validates_sweepers_and_fixed():
+    solver = FormulaSolver()
+    solver.set_formula("z = a*x/y")
+    solver.solve_for_target("z")
+    result = solver.perform_grid_sweep("x", "x", (0, 1, 2), (0, 1, 2), {})
+
+    assert result["status"] == "error"
+    assert "must be different" in result["error"]
+    assert "Missing required variables: a, y" in result["error"]
+
+    result = solver.perform_grid_sweep("x", "y", (0, 1, 2), (1, 2, 2), {"a": "abc"})
+    assert result["error"] == "fixed.a must be float or int, we got str"
+
+
+def test_family_sweep_broadcasts_every_fixed_set():
+    solver = make_solver("S = v*t + a", "S", "t", {"v": 1, "a": 0})
+    result = solver.perform_family_sweep(0, 2, 3, [{"v": 1, "a": 0}, {"v": 5, "a": 1}, {"v": 10, "a": -1}])
+
+    assert result["status"] == "success"
+    assert result["y_grid"].tolist() == [[0, 1, 2], [1, 6, 11], [-1, 9, 19]]
+    assert result["skipped_counts"] == [0, 0, 0]
+
+
+def test_family_sweep_reports_progress_per_batch_and_can_be_abandoned(monkeypatch):
+    import solver as solver_module  # type: ignore
+
+    monkeypatch.setattr(solver_module, "GRID_CHUNK_POINTS", 6)
+    solver = make_solver("S = v*t + a", "S", "t", {"v": 1, "a": 0})
+    fixed_sets = [{"v": v, "a": 0} for v in range(5)]
+    reported = []
+
+    result = solver.perform_family_sweep(0, 2, 3, fixed_sets, progress=reported.append)
+
+    assert reported == [0.0, 0.4, 0.8]
+    assert result["y_grid"][:, 2].tolist() == [0, 2, 4, 6, 8]
+
+    def stop(fraction):
+        if fraction > 0:
+            raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        solver.perform_family_sweep(0, 2, 3, fixed_sets, progress=stop)
+
+
+def test_adaptive_sweep_reports_progress_between_passes():
+    solver = make_solver("y = 1/(x - 0.3)", "y", "x")
+    reported = []
+
+    solver.perform_adaptive_sweep(-1, 1, 400, tolerance=1e-3, progress=reported.append)
+
+    assert len(reported) > 1
+    assert reported == sorted(reported)
+    assert all(0 <= fraction <= 1 for fraction in reported)
+
+
+def test_family_sweep_reports_bad_sets():
+    solver = make_solver("S = v*t + a", "S", "t", {"v": 1, "a": 0})
+    result = solver.perform_family_sweep(0, 2, 3, [{"v": 1, "a": 0}, {"v": 5}])
+
+    assert result["status"] == "error"
+    assert result["error"] == "fixed_sets[1]: Missing required variables: a"
+
+
+def test_numeric_fallback_root_finds_target_per_point():
+    solver = FormulaSolver()
+    solver.set_formula("y = x**5 + x + a*sin(x)")
+    response = solver.solve_for_target("x", numeric_fallback=True)
+    assert response["status"] == "numeric"
+    assert response["required_list_str"] == ["a", "y"]
+    assert solver.pass_sweeper("y")["status_bool"]
+    assert solver.verify_fixed({"a": 0.5})["is_fixed_correct"]
+
+    result = solver.perform_sweep(-10, 10, 401)
+    x_values = np.array(result["x_values"])
+    roots = np.array(result["y_values"])
+
+    assert result["skipped"] == []
+    assert np.allclose(roots**5 + roots + 0.5 * np.sin(roots), x_values, atol=1e-9)
+
+
+def test_numeric_roots_are_continued_along_one_branch():
+    # Roots x = y and x = -1: the scan alone would switch to -1 once it is nearer zero than y
+    solver = FormulaSolver()
+    solver.set_formula("a = (x - y)*(x + 1)")
+    solver.target_variable = "x"
+    y_values = np.linspace(0, 3, 1000)
+
+    roots, valid = solver._solve_numeric_points(y_values, "y", {"a": 0})
+
+    assert valid.all()
+    assert roots == pytest.approx(y_values, abs=1e-9)
+
+
+def test_numeric_fallback_skips_points_without_a_root():
+    solver = FormulaSolver()
+    solver.set_formula("y = x*exp(x) + cos(x)")
+    assert solver.solve_for_target("x", numeric_fallback=True)["status"] == "numeric"
+    solver.pass_sweeper("y")
+
+    result = solver.perform_sweep(-5, 5, 11)
+
+    assert -5.0 in result["skipped"]
+    assert 5.0 in result["x_values"]
+
+
+def test_numeric_fallback_without_sweeper_gives_a_constant_root():
+    solver = FormulaSolver()
+    solver.set_formula("x = cos(x)")
+
+    assert solver.solve_for_target("x")["status"] == "error"
+    response = solver.solve_for_target("x", numeric_fallback=True)
+
+    assert response["status"] == "numeric"
+    assert response["is_const"]
+    assert float(response["solutions"][0]) == pytest.approx(0.7390851332, abs=1e-9)
+
+
+def test_iter_sweep_chunks_match_perform_sweep():
+    solver = make_solver("y = 1/x", "y", "x")
+    chunks = list(solver.iter_sweep(-1, 1, 101, chunk_size=16))
+    whole = solver.perform_sweep(-1, 1, 101)
+
+    assert len(chunks) == 7
+    assert sum((chunk["x_values"] for chunk in chunks), []) == whole["x_values"]
+    assert sum((chunk["y_values"] for chunk in chunks), []) == whole["y_values"]
+    assert sum((chunk["skipped"] for chunk in chunks), []) == whole["skipped"] == [0.0]
+
+
+def test_branch_sweep_matches_sweeping_each_root():
+    solver = make_solver("y = a*x**2 + b", "x", "y", {"a": 2, "b": 1}, index=0)
+    result = solver.perform_branch_sweep(-2, 5, 8)
+
+    assert result["status"] == "success"
+    assert len(result["branches"]) == 2
+    for branch in result["branches"]:
+        single = make_solver("y = a*x**2 + b", "x", "y", {"a": 2, "b": 1}, index=branch["index"])
+        expected = single.perform_sweep(-2, 5, 8)
+        assert [x for x, skipped in zip(result["x_values"], branch["skipped"]) if skipped] == expected["skipped"]
+        assert [y for y in branch["y_values"] if y is not None] == pytest.approx(expected["y_values"])
+
+
+def test_branch_sweep_evalf_fallback_shares_subterms(monkeypatch):
+    solver = make_solver("y = a*x**2 + b", "x", "y", {"a": 2, "b": 1}, index=0)
+    compiled = solver.perform_branch_sweep(0, 5, 6)
+    monkeypatch.setattr(FormulaSolver, "_get_compiled_function", lambda self, names, expression=None: None)
+
+    fallback = solver.perform_branch_sweep(0, 5, 6)
+
+    for compiled_branch, fallback_branch in zip(compiled["branches"], fallback["branches"]):
+        assert fallback_branch["skipped"] == compiled_branch["skipped"]
+        assert [y for y in fallback_branch["y_values"] if y is not None] == pytest.approx(
+            [y for y in compiled_branch["y_values"] if y is not None])
+
+
+def test_branch_sweep_draws_constant_roots_as_flat_lines():
+    solver = FormulaSolver()
+    solver.set_formula("x*(x**2 - 4) = 0")
+    solver.solve_for_target("x")
+    assert solver.choose_solution(0)["is_const"]
+
+    result = solver.perform_branch_sweep(0, 1, 3)
+
+    assert result["status"] == "success"
+    assert result["is_const"]
+    assert sorted(branch["y_values"] for branch in result["branches"]) == [
+        [-2.0, -2.0, -2.0], [0.0, 0.0, 0.0], [2.0, 2.0, 2.0]
+    ]
+
+
+def test_choosing_a_variable_root_after_a_constant_one_needs_a_sweeper():
+    solver = FormulaSolver()
+    solver.set_formula("x*(x - y) = 0")
+    solver.solve_for_target("x")
+    solver.choose_solution(solver.solutions_list_strings.index("0"))
+    assert solver.sweeper == "const"
+
+    solver.choose_solution(solver.solutions_list_strings.index("y"))
+    assert solver.sweeper is None
+
+
+def test_branch_sweep_needs_symbolic_solutions():
+    solver = FormulaSolver()
+    solver.set_formula("y = x**5 + x + a*sin(x)")
+    assert solver.solve_for_target("x", numeric_fallback=True)["status"] == "numeric"
+    solver.pass_sweeper("y")
+    solver.verify_fixed({"a": 0.5})
+
+    result = solver.perform_branch_sweep(0, 1, 3)
+
+    assert result["status"] == "error"
+    assert result["branches"] == []
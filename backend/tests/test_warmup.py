@@ -0,0 +1,41 @@
+# tests/test_warmup.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import solver as solver_module  # type: ignore
+from warmup import load_warmup_pairs, warm_up  # type: ignore
+
+
+def test_warm_up_solves_and_compiles_every_sweeper():
+    solver_module.SOLVE_CACHE.clear()
+    solver_module.COMPILED_CACHE.clear()
+
+    stats = warm_up([("S = v*t + a", "S"), ("y**2 = x", "y"), ("y = 3a", "y")])
+
+    assert stats["solved"] == 2
+    assert stats["failed"] == [{"formula_string": "y = 3a", "target": "y"}]
+    # three sweepers for the first formula, one per root for the second
+    assert stats["kernels"] == 5
+    assert len(solver_module.SOLVE_CACHE.memory) == 2
+
+
+def test_warm_up_leaves_the_solve_pool_in_place():
+    sentinel = object()
+    solver_module.SOLVE_POOL = sentinel
+    try:
+        warm_up([("S = v*t", "S")])
+        assert solver_module.SOLVE_POOL is sentinel
+    finally:
+        solver_module.SOLVE_POOL = None
+
+
+def test_warmup_pairs_come_from_file_then_solve_cache(tmp_path, monkeypatch):
+    path = tmp_path / "warmup.json"
+    path.write_text(json.dumps([{"formula_string": "S = v*t", "target": "S"}]))
+    monkeypatch.setattr(solver_module.SOLVE_CACHE, "most_used", lambda top: [("S = v*t", "S"), ("y = x**2", "x")][:top])
+
+    assert load_warmup_pairs(str(path), top=2) == [("S = v*t", "S"), ("y = x**2", "x")]
+    assert load_warmup_pairs(None, top=0) == []
@@ -0,0 +1,77 @@
+import json
+import time
+from typing import Optional
+
+import solver as solver_module
+from solver import COMPILED_CACHE, SOLVE_CACHE, FormulaSolver
+
+
+def load_warmup_pairs(path: Optional[str] = None, top: int = 0) -> list[tuple[str, str]]:
+    """
+    (formula_string, target) pairs to warm up: the entries of the JSON file at `path`
+    ([{"formula_string": "S = v*t", "target": "S"}, ...]) followed by the `top` most used
+    entries of the on-disk solve cache, without duplicates.
+    """
+    pairs = []
+    if path:
+        with open(path, encoding="utf-8") as file:
+            for entry in json.load(file):
+                pairs.append((entry["formula_string"], entry["target"]))
+    pairs.extend(SOLVE_CACHE.most_used(top))
+    return list(dict.fromkeys(pairs))
+
+
+def warm_up(pairs: list[tuple[str, str]]) -> dict:
+    """
+    Solve every (formula_string, target) pair and compile the sweep kernel of each solution for every
+    possible sweeper, so the first real requests hit SOLVE_CACHE and COMPILED_CACHE.
+    Solving runs in this process even when a SolvePool is configured: warm-up happens before workers
+    are forked, and pool processes started here would be inherited by all of them.
+    Returns counters for /api.
+    """
+    started = time.perf_counter()
+    kernels_before = len(COMPILED_CACHE)
+    solved = 0
+    failed = []
+
+    pool = solver_module.SOLVE_POOL
+    solver_module.SOLVE_POOL = None
+    try:
+        for formula_string, target in pairs:
+            if _warm_formula(formula_string, target):
+                solved += 1
+            else:
+                failed.append({"formula_string": formula_string, "target": target})
+    finally:
+        solver_module.SOLVE_POOL = pool
+
+    return {
+        "formulas": len(pairs),
+        "solved": solved,
+        "failed": failed,
+        "kernels": len(COMPILED_CACHE) - kernels_before,
+        "seconds": time.perf_counter() - started
+    }
+
+
+def _warm_formula(formula_string: str, target: str) -> bool:
+    solver = FormulaSolver()
+    if not solver.set_formula(formula_string)["status_bool"]:
+        return False
+    solve_response = solver.solve_for_target(target)
+    if not solve_response["status_bool"]:
+        return False
+
+    indices = range(len(solver.solutions_list)) if solve_response["needs_choice"] else [None]
+    for index in indices:
+        if index is not None:
+            solver.choose_solution(index)
+        if solver.is_const:
+            continue
+        # Kernels are keyed by argument names only, so any fixed values compile the same function
+        required = solver.get_required_variables()
+        for sweeper in required:
+            solver.pass_sweeper(sweeper)
+            solver.verify_fixed({name: 1.0 for name in required if name != sweeper})
+            solver.perform_sweep(1.0, 2.0, 2)
+    return True
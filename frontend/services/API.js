@@ -187,6 +187,53 @@ class API {
     });
     return response;
   }
+
+  // streams {type: "start" | "chunk" | "end" | "error", ...} records as the sweep is evaluated
+  static async *performSweepStream(requestObject) {
+    const {
+      range: { start, end, steps },
+    } = requestObject || {};
+    const response = await fetch(`${this.#baseUrl}/api/perform_sweep`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      credentials: "include",
+      body: JSON.stringify({ start, end, steps, format: "ndjson" }),
+    });
+
+    if (!response.ok) {
+      yield { type: "error", ...(await response.json()) };
+      return;
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffered = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffered += value;
+      const lines = buffered.split("\n");
+      buffered = lines.pop();
+      for (const line of lines) {
+        if (line) yield JSON.parse(line);
+      }
+    }
+  }
+
+  // whole set_formula -> sweep flow in one round trip; the session carries on from the result
+  static runPipeline(requestObject) {
+    return this.#requestJson("/api/pipeline", { body: requestObject || {} });
+  }
+
+  // raw x/y/skipped arrays so the page can draw the curve itself
+  static performSweepData(requestObject) {
+    const {
+      range: { start, end, steps },
+    } = requestObject || {};
+    const response = this.#requestJson("/api/perform_sweep", {
+      body: { start, end, steps, format: "json" },
+    });
+    return response;
+  }
 }
 
 export default API;